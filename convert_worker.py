@@ -0,0 +1,55 @@
+"""Converter child process for the file2ai web server.
+
+web.py runs this module with ``python -m convert_worker`` and writes one JSON
+object of convert_document arguments per line to its stdin. Each line is
+answered with a JSON line on stdout: null on success, or the error message.
+"""
+import json
+import logging
+import os
+import sys
+from argparse import Namespace
+from typing import Optional
+
+
+class _LastError(logging.Handler):
+    """Logging handler that remembers the last error message logged."""
+
+    def __init__(self):
+        super().__init__(logging.ERROR)
+        self.message: Optional[str] = None
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.message = record.getMessage()
+
+
+def main() -> None:
+    """Convert each argument set read from stdin and report its result on stdout."""
+    last = _LastError()
+    logging.basicConfig(level=logging.WARNING, handlers=[last])
+    # Converter output is kept off the result stream: results go to a copy of
+    # fd 1, and fd 1 itself now points at stderr, so output written at the fd
+    # level (C extensions, pip install subprocesses) can't corrupt the results
+    sys.stdout.flush()
+    results = os.fdopen(os.dup(1), "w")
+    os.dup2(2, 1)
+    # Imported once logging and stdout are set up, so nothing file2ai does at
+    # import time reaches the result stream
+    from file2ai import convert_document
+
+    for line in sys.stdin:
+        last.message = None
+        try:
+            convert_document(Namespace(**json.loads(line)))
+            error = None
+        except SystemExit as e:
+            # The last error the converter logged explains a failed exit best
+            error = e.code and (last.message or f"converter exited with status {e.code}")
+        except Exception as e:
+            error = f"{type(e).__name__}: {e}"
+        results.write(json.dumps(error) + "\n")
+        results.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -38,6 +38,7 @@ import logging
 import mimetypes
 import os
 import re
+import stat
 import subprocess
 import sys
 import tempfile
@@ -811,6 +812,13 @@ def prepare_exports_dir() -> Path:
     return exports_dir
 
 
+# Top-level directories the default ignore patterns (e.g. "node_modules/*") drop
+# wholesale; exports don't walk them at all unless a .gitignore override could bring
+# some of their files back. The patterns are anchored at the root, so nested
+# directories with these names are still exported and must still be walked
+PRUNED_DIRS = frozenset({"__pycache__", "node_modules", "venv"})
+
+
 def load_gitignore_patterns(repo_root: Path) -> Tuple[Set[str], Set[str]]:
     """
     Load .gitignore patterns from the repository root.
@@ -1042,10 +1050,12 @@ def export_files_to_json(
         str(repo_root),
         max_size_kb=max_size_kb,
         pattern_mode=pattern_mode,
-        pattern_input=pattern_input or ""  # Convert None to empty string
+        pattern_input=pattern_input or "",  # Convert None to empty string
+        skip_dirs=frozenset() if ignore_patterns[1] else PRUNED_DIRS,
     )
     
-    # Convert to Path objects and apply gitignore patterns
+    # Convert to Path objects and apply gitignore patterns; should_ignore
+    # already rejects binary files, so they are not probed again below
     files_to_process = []
     for f in filtered_files:
         path_obj = Path(f)
@@ -1055,47 +1065,43 @@ def export_files_to_json(
 
     for i, file_path in enumerate(files_to_process, 1):
         if i % 10 == 0:  # Update every 10 files
-            logger.info(f"Processing files: {i}/{total_files}")
+            logger.info("Processing files: %d/%d", i, total_files)
 
-        if is_text_file(file_path):
-            try:
-                content = file_path.read_text(encoding=DEFAULT_ENCODING)
-                rel_path = file_path.relative_to(repo_root)
+        try:
+            content = file_path.read_text(encoding=DEFAULT_ENCODING)
+            rel_path = file_path.relative_to(repo_root)
 
-                file_entry: FileEntry = {
-                    "path": str(rel_path),
-                    "content": content,
-                    "last_commit": None,
-                }
+            file_entry: FileEntry = {
+                "path": str(rel_path),
+                "content": content,
+                "last_commit": None,
+            }
 
-                if repo and not skip_commit_info:
-                    try:
-                        last_commit = next(repo.iter_commits(paths=str(rel_path), max_count=1))
-                        commit_info: CommitInfo = {
-                            "message": str(last_commit.message.strip()),
-                            "author": str(last_commit.author.name),
-                            "date": str(last_commit.committed_datetime.isoformat()),
-                        }
-                        file_entry["last_commit"] = commit_info
-                    except (StopIteration, Exception) as e:
-                        if not isinstance(e, StopIteration):
-                            logger.warning(f"Could not get commit info for {file_path}: {e}")
-                        # last_commit is already None by default
-
-                data.append(file_entry)
-
-                # Update stats
-                stats["processed_files"] += 1
-                stats["total_chars"] += len(content)
-                stats["total_lines"] += content.count("\n") + 1
-                stats["total_tokens"] += len(content.split())
-
-                logger.debug(f"Processed file: {file_path}")
-            except Exception as e:
-                logger.warning(f"Failed to process {file_path}: {e}")
-                stats["skipped_files"] += 1
-        else:
-            logger.debug(f"Skipped binary file: {file_path}")
+            if repo and not skip_commit_info:
+                try:
+                    last_commit = next(repo.iter_commits(paths=str(rel_path), max_count=1))
+                    commit_info: CommitInfo = {
+                        "message": str(last_commit.message.strip()),
+                        "author": str(last_commit.author.name),
+                        "date": str(last_commit.committed_datetime.isoformat()),
+                    }
+                    file_entry["last_commit"] = commit_info
+                except (StopIteration, Exception) as e:
+                    if not isinstance(e, StopIteration):
+                        logger.warning(f"Could not get commit info for {file_path}: {e}")
+                    # last_commit is already None by default
+
+            data.append(file_entry)
+
+            # Update stats
+            stats["processed_files"] += 1
+            stats["total_chars"] += len(content)
+            stats["total_lines"] += content.count("\n") + 1
+            stats["total_tokens"] += len(content.split())
+
+            logger.debug("Processed file: %s", file_path)
+        except Exception as e:
+            logger.warning(f"Failed to process {file_path}: {e}")
             stats["skipped_files"] += 1
 
     # Write JSON output
@@ -1166,10 +1172,12 @@ def _process_repository_files(
         str(repo_root),
         max_size_kb=max_size_kb,
         pattern_mode=pattern_mode,
-        pattern_input=pattern_input or ""  # Convert None to empty string
+        pattern_input=pattern_input or "",  # Convert None to empty string
+        skip_dirs=frozenset() if ignore_patterns[1] else PRUNED_DIRS,
     )
     
-    # Convert to Path objects and apply gitignore patterns
+    # Convert to Path objects and apply gitignore patterns; should_ignore
+    # already rejects binary files, so they are not probed again below
     files_to_process = []
     for f in filtered_files:
         path_obj = Path(f)
@@ -1180,48 +1188,44 @@ def _process_repository_files(
 
     for i, file_path in enumerate(files_to_process, 1):
         if i % 10 == 0:  # Update every 10 files
-            logger.info(f"Processing files: {i}/{total_files}")
-        if is_text_file(file_path):
-            try:
-                content = file_path.read_text(encoding=DEFAULT_ENCODING)
+            logger.info("Processing files: %d/%d", i, total_files)
+        try:
+            content = file_path.read_text(encoding=DEFAULT_ENCODING)
 
-                # Write file header
-                outfile.write(f"File: {file_path}\n")
-                outfile.write("-" * 80 + "\n")
+            # Write file header
+            outfile.write(f"File: {file_path}\n")
+            outfile.write("-" * 80 + "\n")
 
-                if repo:
-                    # Attempt to get last commit info if the file is tracked in Git
-                    rel_path = file_path.relative_to(repo_root)
-                    try:
-                        last_commit = next(repo.iter_commits(paths=str(rel_path), max_count=1))
-                        commit_msg = last_commit.message.strip()
-                        author = last_commit.author.name
-                        commit_date = last_commit.committed_datetime.isoformat()[
-                            :10
-                        ]  # Get YYYY-MM-DD part
-                        outfile.write(f"Last Commit: {commit_msg} by {author} on {commit_date}\n\n")
-                    except StopIteration:
-                        outfile.write("Last Commit: No commits found\n\n")
-                    except Exception as e:
-                        logger.warning(f"Could not get commit info for {file_path}: {e}")
-                        outfile.write("Last Commit: Unknown\n\n")
+            if repo:
+                # Attempt to get last commit info if the file is tracked in Git
+                rel_path = file_path.relative_to(repo_root)
+                try:
+                    last_commit = next(repo.iter_commits(paths=str(rel_path), max_count=1))
+                    commit_msg = last_commit.message.strip()
+                    author = last_commit.author.name
+                    commit_date = last_commit.committed_datetime.isoformat()[
+                        :10
+                    ]  # Get YYYY-MM-DD part
+                    outfile.write(f"Last Commit: {commit_msg} by {author} on {commit_date}\n\n")
+                except StopIteration:
+                    outfile.write("Last Commit: No commits found\n\n")
+                except Exception as e:
+                    logger.warning(f"Could not get commit info for {file_path}: {e}")
+                    outfile.write("Last Commit: Unknown\n\n")
 
-                # Write file content
-                outfile.write(content)
-                outfile.write("\n" + "=" * 80 + "\n\n")
+            # Write file content
+            outfile.write(content)
+            outfile.write("\n" + "=" * 80 + "\n\n")
 
-                # Update stats
-                stats["processed_files"] += 1
-                stats["total_chars"] += len(content)
-                stats["total_lines"] += content.count("\n") + 1
-                stats["total_tokens"] += len(content.split())
+            # Update stats
+            stats["processed_files"] += 1
+            stats["total_chars"] += len(content)
+            stats["total_lines"] += content.count("\n") + 1
+            stats["total_tokens"] += len(content.split())
 
-                logger.debug(f"Processed file: {file_path}")
-            except Exception as e:
-                logger.warning(f"Failed to process {file_path}: {e}")
-                stats["skipped_files"] += 1
-        else:
-            logger.debug(f"Skipped binary file: {file_path}")
+            logger.debug("Processed file: %s", file_path)
+        except Exception as e:
+            logger.warning(f"Failed to process {file_path}: {e}")
             stats["skipped_files"] += 1
 
 
@@ -1298,14 +1302,18 @@ def clone_and_export(args: argparse.Namespace) -> None:
         logger.info(f"Cloning repository to: {clone_path}")
 
         try:
-            # Ensure all arguments are strings
-            cmd = ["git", "clone", str(clone_url), str(clone_path)]
+            # Ensure all arguments are strings. A blobless clone still fetches every
+            # commit and tree, so per-file last-commit info is unchanged, but only
+            # downloads file contents for the checked-out revision
+            cmd = ["git", "clone", "--filter=blob:none", str(clone_url), str(clone_path)]
             subprocess.run(
                 cmd,
                 check=True,
                 stdout=subprocess.DEVNULL,
                 stderr=subprocess.PIPE,
                 text=True,
+                # Fail at once when credentials are missing instead of waiting on a prompt
+                env={**os.environ, "GIT_TERMINAL_PROMPT": "0"},
             )
             logger.info("Repository cloned successfully")
         except subprocess.CalledProcessError as e:
@@ -1379,10 +1387,13 @@ def local_export(args: argparse.Namespace) -> None:
         local_dir = base_dir.resolve()
         logger.info("Using base directory")
     
-    if not local_dir.exists():
+    # One stat answers both checks
+    try:
+        is_dir = stat.S_ISDIR(local_dir.stat().st_mode)
+    except FileNotFoundError:
         logger.error(f"Directory does not exist: {local_dir}")
         raise FileNotFoundError(f"Directory does not exist: {local_dir}")
-    if not local_dir.is_dir():
+    if not is_dir:
         logger.error(f"Path is not a directory: {local_dir}")
         raise NotADirectoryError(f"Path is not a directory: {local_dir}")
         
@@ -101,33 +101,44 @@ document.addEventListener('DOMContentLoaded', () => {
     elements.errorContainer.style.display = 'block';
   }
 
+  // Apply a status update; returns true once the job has finished
+  async function handleJobStatus(data) {
+    if (data.error) {
+      state.error = data.error;
+      state.status = 'failed';
+      showError(data.error);
+      return true;
+    }
+
+    state.progress = data.progress || 0;
+    updateSubmitButton();
+
+    if (data.status === 'completed' || data.status === 'completed_with_errors') {
+      state.status = 'completed';
+      if (data.errors?.length) {
+        showError(data.errors.join('\n'));
+      }
+      if (state.outputFormat === 'text') {
+        await fetchPreview(state.jobId);
+      }
+      window.location.href = `/download/${state.jobId}`;
+      elements.progressBar.style.display = 'none';
+      return true;
+    }
+    if (data.status === 'failed') {
+      state.status = 'failed';
+      state.error = data.errors?.join('\n') || 'Conversion failed';
+      showError(state.error);
+      return true;
+    }
+    return false;
+  }
+
   async function checkJobStatus() {
     try {
       const response = await fetch(`/status/${state.jobId}`);
       const data = await response.json();
-      
-      if (data.error) {
-        state.error = data.error;
-        state.status = 'failed';
-        showError(data.error);
-        return;
-      }
-
-      state.progress = data.progress || 0;
-      updateSubmitButton();
-
-      if (data.status === 'completed') {
-        state.status = 'completed';
-        if (state.outputFormat === 'text') {
-          await fetchPreview(state.jobId);
-        }
-        window.location.href = `/download/${state.jobId}`;
-        elements.progressBar.style.display = 'none';
-      } else if (data.status === 'failed') {
-        state.status = 'failed';
-        state.error = data.errors?.join('\n') || 'Conversion failed';
-        showError(state.error);
-      } else {
+      if (!(await handleJobStatus(data))) {
         setTimeout(checkJobStatus, 1000);
       }
     } catch (err) {
@@ -137,6 +148,35 @@ document.addEventListener('DOMContentLoaded', () => {
     }
   }
 
+  // Follow the job over one event stream; fall back to polling /status if the
+  // stream can't be opened (e.g. the server is at its stream limit) or drops
+  function watchJobStatus() {
+    if (!window.EventSource) {
+      checkJobStatus();
+      return;
+    }
+    let finished = false;
+    const events = new EventSource(`/events/${state.jobId}`);
+    events.onmessage = async (e) => {
+      if (finished) return;
+      const data = JSON.parse(e.data);
+      // The server ends the stream after a final status; close first so that
+      // isn't reported as an error
+      if (['completed', 'completed_with_errors', 'failed'].includes(data.status)) {
+        finished = true;
+        events.close();
+      }
+      await handleJobStatus(data);
+    };
+    events.onerror = () => {
+      events.close();
+      if (!finished) {
+        finished = true;
+        checkJobStatus();
+      }
+    };
+  }
+
   // Event Listeners
   elements.inputType.addEventListener('change', (e) => {
     state.inputType = e.target.value;
@@ -219,10 +259,13 @@ document.addEventListener('DOMContentLoaded', () => {
       formData.append('local_dir', state.localDir);
     }
 
+    // Exports carry no files, so send them URL-encoded and spare the server a multipart parse
+    const body = state.inputType === 'file' ? formData : new URLSearchParams(formData);
+
     try {
       const response = await fetch('/', {
         method: 'POST',
-        body: formData
+        body
       });
       const data = await response.json();
       
@@ -232,7 +275,7 @@ document.addEventListener('DOMContentLoaded', () => {
         showError(data.error);
       } else {
         state.jobId = data.job_id;
-        checkJobStatus();
+        watchJobStatus();
       }
     } catch (err) {
       state.error = 'Failed to start conversion';
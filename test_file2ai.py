@@ -1452,6 +1452,144 @@ def test_validate_github_url():
     assert validate_github_url("") is False
 
 
+@pytest.mark.parametrize(
+    "path",
+    [
+        "main.py",
+        "src/app/main.py",
+        "src/app/mainpy",
+        "docs/a.md",
+        "docs/ab.md",
+        "docs/b.md",
+        "docs/[x].md",
+        "docs/&.md",
+        "node_modules/lodash.js",
+        "pkg/node_modules/lodash.js",
+        "pkg/node_modules/lib/deep.js",
+        "build/out/main.o",
+        "src/build",
+        "/abs/main.py",
+        "/abs/src/main.py",
+        "/other/abs/src/main.py",
+    ],
+)
+@pytest.mark.parametrize(
+    "pattern",
+    [
+        "*.py",
+        "src/*.py",
+        "app/*.py",
+        "**/*.py",
+        "src/**/main.py",
+        "?.md",
+        "??.md",
+        "[ab].md",
+        "[!a].md",
+        "[a-c]b.md",
+        "[[]x].md",
+        "[&&]md",
+        "[&].md",
+        "node_modules/*",
+        "build/",
+        "out/",
+        "/abs/src/*.py",
+        "/abs/*.py",
+    ],
+)
+def test_compile_patterns_matches_path_match(pattern, path):
+    """The compiled pattern regex agrees with PurePosixPath.match."""
+    from pathlib import PurePosixPath
+    from utils import compile_patterns
+
+    regex = compile_patterns(pattern)
+    assert (regex.search(path) is not None) == PurePosixPath(path).match(pattern)
+
+
+def test_compile_patterns_union():
+    """Semicolon-separated patterns compile to one regex matching any of them."""
+    from utils import compile_patterns, matches_pattern
+
+    assert compile_patterns("") is None
+    assert compile_patterns(" ; ") is None
+    regex = compile_patterns("*.md; build/*")
+    assert regex.search("docs/readme.md")
+    assert regex.search("build/out.txt")
+    assert not regex.search("src/main.py")
+    assert matches_pattern(Path("docs/readme.md"), "*.py;*.md")
+    assert not matches_pattern("docs/readme.md", "")
+
+
+def _make_walk_tree(root):
+    """Create a small tree with nested, hidden, oversized and filtered files."""
+    files = {
+        "a.py": "a",
+        "notes.log": "log",
+        "src/b.py": "b",
+        "src/pkg/c.py": "c",
+        "src/pkg/deep/d.txt": "d",
+        "src/node_modules/e.js": "e",
+        "node_modules/f.js": "f",
+        "docs/big.md": "x" * 4096,
+        "docs/small.md": "s",
+        ".hidden/g.py": "g",
+        "src/.cache/h.py": "h",
+        "src/.env": "SECRET=1",
+    }
+    for rel, text in files.items():
+        path = root / rel
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(text)
+    (root / "empty_dir").mkdir()
+
+
+def test_gather_filtered_files_matches_rglob(tmp_path):
+    """The pruning walk keeps the same files as filtering a plain rglob."""
+    from pathlib import PurePosixPath
+    from utils import gather_filtered_files
+
+    _make_walk_tree(tmp_path)
+    base = tmp_path.resolve()
+    expected = sorted(
+        str(p)
+        for p in base.rglob("*")
+        if p.is_file()
+        and not any(part.startswith(".") for part in p.relative_to(base).parts)
+        and p.stat().st_size <= 1024
+        and not PurePosixPath(p).match("*.log")
+    )
+    found = gather_filtered_files(str(tmp_path), 1, "exclude", "*.log")
+    assert found == expected
+    assert str(base / "src" / "pkg" / "deep" / "d.txt") in found
+
+
+def test_gather_filtered_files_max_files(tmp_path):
+    """TooManyFilesError is raised once more than max_files files match."""
+    from utils import TooManyFilesError, gather_filtered_files
+
+    for i in range(5):
+        (tmp_path / f"f{i}.txt").write_text("x")
+    assert len(gather_filtered_files(str(tmp_path), 50, "exclude", "", max_files=5)) == 5
+    with pytest.raises(TooManyFilesError) as excinfo:
+        gather_filtered_files(str(tmp_path), 50, "exclude", "", max_files=4)
+    assert excinfo.value.max_files == 4
+
+
+@pytest.mark.parametrize("skip_dirs", [frozenset(), frozenset({"node_modules"})])
+def test_gather_filtered_files_threaded_walk(tmp_path, skip_dirs):
+    """A threaded walk finds the same files as the serial one."""
+    from utils import gather_filtered_files
+
+    _make_walk_tree(tmp_path)
+    serial = gather_filtered_files(str(tmp_path), 50, "exclude", "", skip_dirs=skip_dirs)
+    threaded = gather_filtered_files(
+        str(tmp_path), 50, "exclude", "", skip_dirs=skip_dirs, walk_threads=4
+    )
+    assert threaded == serial
+    # skip_dirs only prunes directories directly under the walk's root
+    assert any(path.endswith("e.js") for path in serial)
+    assert any(path.endswith("f.js") for path in serial) == (not skip_dirs)
+
+
 def test_text_export_error_handling(tmp_path, caplog):
     """Test text export error handling with invalid files."""
     import logging
@@ -1865,6 +2003,41 @@ def test_local_export(tmp_path, caplog):
     assert any("Using subdirectory: subdir" in record.message for record in caplog.records)
 
 
+def test_local_export_prunes_only_top_level_dependency_dirs(tmp_path):
+    """Dependency directories are skipped at the root but exported when nested."""
+    local_dir = tmp_path / "local_project"
+    (local_dir / "node_modules").mkdir(parents=True)
+    (local_dir / "node_modules" / "top.js").write_text("console.log('top')")
+    (local_dir / "venv").mkdir()
+    (local_dir / "venv" / "site.py").write_text("print('venv')")
+    nested = local_dir / "pkg" / "node_modules" / "lib"
+    nested.mkdir(parents=True)
+    (nested / "deep.js").write_text("console.log('deep')")
+    (local_dir / "pkg" / "venv").mkdir()
+    (local_dir / "pkg" / "venv" / "tool.py").write_text("print('tool')")
+    (local_dir / "main.py").write_text("print('main')")
+
+    exports_dir = tmp_path / "exports"
+    exports_dir.mkdir()
+
+    args = argparse.Namespace()
+    args.local_dir = str(local_dir)
+    args.format = "text"
+    args.output_file = "nested_export.txt"
+    args.skip_remove = False
+    args.subdir = None
+
+    with patch("file2ai.EXPORTS_DIR", str(exports_dir)):
+        local_export(args)
+
+    content = (exports_dir / "nested_export.txt").read_text()
+    assert "print('main')" in content
+    assert "console.log('deep')" in content
+    assert "print('tool')" in content
+    assert "console.log('top')" not in content
+    assert "print('venv')" not in content
+
+
 def test_branch_handling(tmp_path, caplog):
     """Test branch checkout behavior."""
     import logging
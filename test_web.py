@@ -0,0 +1,460 @@
+"""Tests for the web API."""
+import importlib
+import importlib.util
+import io
+import json
+import pathlib
+import subprocess
+import sys
+import threading
+import time
+import zipfile
+
+import pytest
+
+# Only check that flask is installed: importing it here would bind werkzeug to
+# test_file2ai's mock os, so it is first imported with web, in the fixture below
+if importlib.util.find_spec("flask") is None:
+    pytest.skip("flask is not installed", allow_module_level=True)
+
+
+@pytest.fixture(scope="module")
+def web():
+    # test_file2ai.py swaps a mock os module into sys.modules for the whole session;
+    # import the app against the real one, which pathlib still references
+    with pytest.MonkeyPatch.context() as mp:
+        mp.setitem(sys.modules, "os", pathlib.os)
+        mp.setitem(sys.modules, "os.path", pathlib.os.path)
+        return importlib.import_module("web")
+
+
+@pytest.fixture
+def client(web):
+    return web.app.test_client()
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        {"command": "convert", "format": "bogus"},
+        {"command": "convert"},
+        {"command": "convert", "file": (io.BytesIO(b"MZ"), "tool.exe")},
+        {"command": "convert", "file": (io.BytesIO(b"text"), "notes.txt", "image/png")},
+        {"command": "export"},
+        {"command": "export", "local_dir": "/nonexistent/file2ai-test-dir"},
+    ],
+)
+def test_rejected_post_leaves_no_job(web, client, data):
+    """A submission that fails validation must not register a job."""
+    before = len(web.conversion_jobs)
+    response = client.post("/", data=data, content_type="multipart/form-data")
+    assert response.status_code == 400
+    assert "error" in response.get_json()
+    assert len(web.conversion_jobs) == before
+
+
+class _CountingStream(io.BytesIO):
+    """Request body that records how many bytes the server read from it."""
+
+    def __init__(self, data):
+        super().__init__(data)
+        self.bytes_read = 0
+
+    def read(self, size=-1):
+        data = super().read(size)
+        self.bytes_read += len(data)
+        return data
+
+    def readline(self, size=-1):
+        data = super().readline(size)
+        self.bytes_read += len(data)
+        return data
+
+    def readinto(self, buffer):
+        size = super().readinto(buffer)
+        self.bytes_read += size
+        return size
+
+
+def test_full_convert_pool_refuses_upload_unread(web, client, monkeypatch):
+    """Uploads are refused with 503 before their body is parsed."""
+    monkeypatch.setitem(web._pending_jobs, web.JOB_POOL, max(web.MAX_PENDING_JOBS, 1))
+    monkeypatch.setattr(web, "MAX_PENDING_JOBS", max(web.MAX_PENDING_JOBS, 1))
+    boundary = "file2ai-test"
+    body = (
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="command"\r\n\r\nconvert\r\n'
+        f"--{boundary}\r\n"
+        'Content-Disposition: form-data; name="file"; filename="a.txt"\r\n'
+        "Content-Type: text/plain\r\n\r\n"
+        + "x" * 100000
+        + f"\r\n--{boundary}--\r\n"
+    ).encode()
+    stream = _CountingStream(body)
+    response = client.post(
+        "/",
+        input_stream=stream,
+        content_length=len(body),
+        content_type=f"multipart/form-data; boundary={boundary}",
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+    assert stream.bytes_read == 0
+
+
+_FAKE_WORKER = '''\
+import json, os, sys, time
+for line in sys.stdin:
+    name = os.path.basename(json.loads(line)["input"])
+    if name.startswith("crash"):
+        os._exit(3)
+    if name.startswith("hang"):
+        time.sleep(60)
+    sys.stdout.write("null\\n")
+    sys.stdout.flush()
+'''
+
+
+@pytest.fixture
+def fake_worker(web, tmp_path, monkeypatch):
+    """Run a stand-in convert_worker that crashes or hangs on request."""
+    worker_dir = tmp_path / "worker"
+    worker_dir.mkdir()
+    (worker_dir / "convert_worker.py").write_text(_FAKE_WORKER)
+    # python -m looks in the working directory before PYTHONPATH
+    monkeypatch.chdir(worker_dir)
+    monkeypatch.setitem(web._CONVERT_ENV, "PYTHONPATH", str(worker_dir))
+
+
+def test_convert_worker_keeps_fd_output_off_results(tmp_path):
+    """Output written straight to fd 1, even by subprocesses, goes to stderr."""
+    (tmp_path / "file2ai.py").write_text(
+        "import os, subprocess, sys\n"
+        "def convert_document(args):\n"
+        "    os.write(1, b'fd\\n')\n"
+        "    subprocess.run([sys.executable, '-c', 'print(1)'])\n"
+        "    print('py')\n"
+    )
+    worker_dir = pathlib.Path(__file__).parent
+    result = subprocess.run(
+        [sys.executable, "-m", "convert_worker"],
+        input="{}\n{}\n",
+        capture_output=True,
+        text=True,
+        cwd=tmp_path,
+        env=dict(pathlib.os.environ, PYTHONPATH=f"{tmp_path}{pathlib.os.pathsep}{worker_dir}"),
+    )
+    assert result.stdout == "null\nnull\n"
+    assert result.stderr.split() == ["fd", "1", "py"] * 2
+
+
+def _run_batch(web, names):
+    results = []
+    web._run_convert_batch(
+        [{"input": name} for name in names], lambda *result: results.append(result)
+    )
+    return results
+
+
+def test_convert_batch_renames_outputs(web, tmp_path, monkeypatch):
+    """Converted outputs are renamed from their .partial_ name once complete."""
+    monkeypatch.chdir(tmp_path)  # The converter only writes under ./exports
+    output_dir = pathlib.Path("exports", "job")
+    output_dir.mkdir(parents=True)
+    batch = []
+    for idx, name in enumerate(["a.txt", "b.txt"]):
+        staged = tmp_path / name
+        staged.write_text(f"contents of {name}")
+        batch.append((idx, (name, staged)))
+    reports = []
+    web._convert_batch(batch, output_dir, web.JobOptions(), lambda *r: reports.append(r))
+    assert sorted(reports) == [
+        (0, output_dir / "a.txt.text", None),
+        (1, output_dir / "b.txt.text", None),
+    ]
+    assert sorted(p.name for p in output_dir.iterdir()) == ["a.txt.text", "b.txt.text"]
+    assert (output_dir / "a.txt.text").read_text().strip() == "contents of a.txt"
+
+
+def test_convert_batch_survives_child_exit(web, fake_worker):
+    """A conversion that kills the child fails alone; the rest still convert."""
+    assert _run_batch(web, ["ok1", "crash", "ok2", "ok3"]) == [
+        (0, None),
+        (1, "converter exited with status 3"),
+        (2, None),
+        (3, None),
+    ]
+
+
+def test_convert_batch_timeout(web, fake_worker, monkeypatch):
+    """A conversion past CONVERT_TIMEOUT_SECONDS fails; the rest still convert."""
+    monkeypatch.setattr(web, "CONVERT_TIMEOUT_SECONDS", 1)
+    assert _run_batch(web, ["hang", "ok"]) == [
+        (0, "conversion timed out after 1s"),
+        (1, None),
+    ]
+
+
+def test_convert_job_fails_when_converter_cannot_start(web, tmp_path, monkeypatch):
+    """Every file is reported and the job finishes if no converter can start."""
+    def refuse(*args, **kwargs):
+        raise OSError("no interpreter")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(web.subprocess, "Popen", refuse)
+    files = {}
+    for name in ["a.txt", "b.txt", "c.txt"]:
+        files[name] = tmp_path / name
+        files[name].write_text(name)
+    job_id = web._register_job()
+    try:
+        web.process_job(job_id, "convert", files, web.JobOptions())
+        job = web._get_job(job_id)
+        assert job["status"] == "failed"
+        assert sorted(job["errors"]) == [
+            f"Error converting {name}: no interpreter" for name in ["a.txt", "b.txt", "c.txt"]
+        ]
+        assert not any(path.exists() for path in files.values())
+    finally:
+        web._pop_job(job_id)
+
+
+@pytest.mark.parametrize(
+    "gitignore, status",
+    [
+        (None, "completed"),
+        # An override can bring node_modules files back, so it is walked and counted
+        ("!node_modules/keep.js\n", "failed"),
+    ],
+)
+def test_export_scan_skips_pruned_dirs(web, tmp_path, monkeypatch, gitignore, status):
+    """The pre-export scan doesn't count dependency trees the export never reads."""
+    def fake_export(args):
+        pathlib.Path(args.output).write_text("exported")
+
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(web, "MAX_EXPORT_FILES", 3)
+    monkeypatch.setattr(web, "local_export", fake_export)
+    src = tmp_path / "src"
+    (src / "node_modules" / "pkg").mkdir(parents=True)
+    (src / "main.py").write_text("print(1)\n")
+    for i in range(5):
+        (src / "node_modules" / "pkg" / f"m{i}.js").write_text("x\n")
+    if gitignore:
+        (src / ".gitignore").write_text(gitignore)
+    job_id = web._register_job()
+    try:
+        web.process_job(job_id, "export", options=web.JobOptions(local_dir=str(src)))
+        job = web._get_job(job_id)
+        assert job["status"] == status
+        if status == "failed":
+            assert any("more than 3 matching files" in error for error in job["errors"])
+    finally:
+        web._pop_job(job_id)
+
+
+@pytest.fixture
+def spool_dir(web, tmp_path, monkeypatch):
+    """Spool uploads past 16 bytes into a temporary UPLOADS_DIR."""
+    monkeypatch.setattr(web, "UPLOADS_PATH", tmp_path)
+    monkeypatch.setattr(web, "UPLOAD_SPOOL_BYTES", 16)
+    return tmp_path
+
+
+def test_spool_small_upload_stays_in_memory(web, spool_dir):
+    spool = web._LimitedSpool("a.txt")
+    spool.write(b"short")
+    spool.seek(0)
+    assert spool.read() == b"short"
+    assert spool.size == 5
+    assert not spool.move_to(spool_dir / "staged")
+    assert list(spool_dir.iterdir()) == []
+    spool.close()
+
+
+def test_spool_rolls_over_and_moves(web, spool_dir):
+    spool = web._LimitedSpool("a.txt")
+    for chunk in (b"0123456789", b"abcdefghij", b"KLMNOPQRST"):
+        spool.write(chunk)
+    assert [p.name[:7] for p in spool_dir.iterdir()] == [".spool-"]
+    spool.seek(10)
+    assert spool.read(5) == b"abcde"
+    staged = spool_dir / "staged"
+    assert spool.move_to(staged)
+    spool.close()
+    assert staged.read_bytes() == b"0123456789abcdefghijKLMNOPQRST"
+    assert list(spool_dir.iterdir()) == [staged]
+
+
+def test_spool_close_removes_unmoved_file(web, spool_dir):
+    spool = web._LimitedSpool("a.txt")
+    spool.write(b"x" * 32)
+    assert len(list(spool_dir.iterdir())) == 1
+    spool.close()
+    assert list(spool_dir.iterdir()) == []
+    assert spool.closed
+
+
+def test_spool_failure_is_a_retryable_error(web, client, tmp_path, monkeypatch):
+    """An upload that can't be spooled to disk is refused with 503, not a bare 500."""
+    monkeypatch.setattr(web, "UPLOADS_PATH", tmp_path / "missing")
+    monkeypatch.setattr(web, "UPLOAD_SPOOL_BYTES", 16)
+    before = len(web.conversion_jobs)
+    response = client.post(
+        "/",
+        data={"command": "convert", "file": (io.BytesIO(b"x" * 64), "a.txt", "text/plain")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"]
+    assert "a.txt" in response.get_json()["error"]
+    assert len(web.conversion_jobs) == before
+
+
+def test_remove_stale_spools(web, spool_dir):
+    stale = spool_dir / ".spool-stale"
+    fresh = spool_dir / ".spool-fresh"
+    staged = spool_dir / "job_0_a.txt"
+    for path in (stale, fresh, staged):
+        path.write_bytes(b"x")
+    pathlib.os.utime(stale, (0, 0))
+    pathlib.os.utime(staged, (0, 0))
+    web._remove_stale_spools()
+    assert sorted(p.name for p in spool_dir.iterdir()) == [".spool-fresh", "job_0_a.txt"]
+
+
+@pytest.fixture
+def job_id(web):
+    """Register a queued job for the test, removing it afterwards."""
+    job_id = web._register_job()
+    yield job_id
+    web._pop_job(job_id)
+
+
+def _later(action, delay=0.1):
+    timer = threading.Timer(delay, action)
+    timer.start()
+    return timer
+
+
+def test_wait_returns_on_status_change(web, job_id):
+    seen = web.job_state(web._get_job(job_id))
+    assert web.conversion_jobs.wait(job_id, seen, timeout=0.01)["status"] == "queued"
+    _later(lambda: web._update_job(job_id, status="processing"))
+    started = time.monotonic()
+    job = web.conversion_jobs.wait(job_id, seen, timeout=5)
+    assert job["status"] == "processing"
+    assert time.monotonic() - started < 5
+
+
+def _event_data(event):
+    assert event.startswith("data: ")
+    return json.loads(event[len("data: "):])
+
+
+def test_job_events_follow_status_until_terminal(web, job_id, monkeypatch):
+    monkeypatch.setattr(web, "EVENT_KEEPALIVE_SECONDS", 0.05)
+    events = web._iter_job_events(job_id)
+    assert _event_data(next(events))["status"] == "queued"
+    assert next(events) == ": keep-alive\n\n"
+    web._update_job(job_id, status="processing", progress=50)
+    assert _event_data(next(events))["progress"] == 50
+    monkeypatch.setattr(web, "EVENT_KEEPALIVE_SECONDS", 5)
+    _later(lambda: web._update_job(job_id, status="completed", progress=100))
+    assert _event_data(next(events))["status"] == "completed"
+    with pytest.raises(StopIteration):
+        next(events)
+
+
+def test_job_events_report_evicted_job(web, job_id):
+    events = web._iter_job_events(job_id)
+    next(events)
+    _later(lambda: web._pop_job(job_id))
+    event = next(events)
+    assert event.startswith("event: error\n")
+    with pytest.raises(StopIteration):
+        next(events)
+
+
+def test_event_streams_are_capped(web, client, job_id, monkeypatch):
+    slots = threading.BoundedSemaphore(1)
+    monkeypatch.setattr(web, "_event_stream_slots", slots)
+    web._update_job(job_id, status="completed", progress=100)
+
+    response = client.get(f"/events/{job_id}", buffered=False)
+    assert response.status_code == 200
+    assert response.mimetype == "text/event-stream"
+    refused = client.get(f"/events/{job_id}")
+    assert refused.status_code == 503
+    assert refused.headers["Retry-After"]
+
+    assert _event_data(response.get_data(as_text=True))["status"] == "completed"
+    response.close()  # Runs call_on_close, releasing the slot
+    assert slots.acquire(blocking=False)
+
+
+@pytest.fixture
+def finished_job(web, job_id, tmp_path):
+    """Mark the test job completed with two outputs, plus a file it didn't produce."""
+    outputs = []
+    for name, content in [("a.txt.text", "first"), ("b.txt.text", "second")]:
+        outputs.append(tmp_path / name)
+        outputs[-1].write_text(content)
+    (tmp_path / "other.text").write_text("not this job's")
+    web._update_job(job_id, status="completed", progress=100, output_files=outputs)
+    return job_id
+
+
+def test_download_streams_stored_zip(web, client, finished_job):
+    response = client.get(f"/download/{finished_job}")
+    assert response.status_code == 200
+    assert response.mimetype == "application/zip"
+    assert response.headers["ETag"] == f'"{finished_job}-zip"'
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        assert archive.testzip() is None
+        assert {info.compress_type for info in archive.infolist()} == {zipfile.ZIP_STORED}
+        assert archive.read("a.txt.text") == b"first"
+        assert archive.read("b.txt.text") == b"second"
+
+
+def test_download_zip_revalidates_with_304(web, client, finished_job):
+    response = client.get(
+        f"/download/{finished_job}", headers={"If-None-Match": f'"{finished_job}-zip"'}
+    )
+    assert response.status_code == 304
+    assert response.data == b""
+
+
+def test_download_archive_of_single_output(web, client, finished_job):
+    job = web._get_job(finished_job)
+    web._update_job(finished_job, output_files=job["output_files"][:1])
+    plain = client.get(f"/download/{finished_job}")
+    assert plain.mimetype != "application/zip"
+    assert plain.data == b"first"
+    plain.close()
+    response = client.get(f"/download/{finished_job}?archive=1")
+    assert response.mimetype == "application/zip"
+    with zipfile.ZipFile(io.BytesIO(response.data)) as archive:
+        assert archive.namelist() == ["a.txt.text"]
+
+
+def test_download_single_named_output(web, client, finished_job):
+    response = client.get(f"/download/{finished_job}/b.txt.text")
+    assert response.status_code == 200
+    assert response.data == b"second"
+    assert "attachment" in response.headers["Content-Disposition"]
+    response.close()
+    # Only files the job produced are served, even from the same directory
+    assert client.get(f"/download/{finished_job}/other.text").status_code == 404
+    assert client.get("/download/no-such-job/a.txt.text").status_code == 404
+
+
+def test_process_job_skips_removed_job(web, tmp_path):
+    """A job removed by /cleanup before it ran is not brought back."""
+    staged = tmp_path / "a.txt"
+    staged.write_text("a")
+    job_id = web._register_job()
+    web._pop_job(job_id)
+    web.process_job(job_id, "convert", {"a.txt": staged}, web.JobOptions())
+    assert web._get_job(job_id) is None
+    assert not staged.exists()
@@ -1,11 +1,95 @@
 """Shared utility functions for file2ai."""
 import os
+import re
+import stat
 import logging
-from pathlib import Path
-from typing import List, Union
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+from pathlib import Path, PurePath
+from typing import AbstractSet, Iterator, List, Optional, Pattern, Tuple, Union
 
 logger = logging.getLogger(__name__)
 
+
+class TooManyFilesError(IOError):
+    """Raised when a directory scan finds more matching files than allowed."""
+
+    def __init__(self, max_files: int):
+        super().__init__(f"Directory has more than {max_files} matching files")
+        self.max_files = max_files
+
+
+def _glob_component_to_regex(component: str) -> str:
+    """Translate a single glob path component into a regex fragment.
+    
+    Wildcards never match the path separator, mirroring Path.match.
+    """
+    parts = []
+    i, n = 0, len(component)
+    while i < n:
+        c = component[i]
+        i += 1
+        if c == '*':
+            parts.append('[^/]*')
+        elif c == '?':
+            parts.append('[^/]')
+        elif c == '[':
+            j = i
+            if j < n and component[j] == '!':
+                j += 1
+            if j < n and component[j] == ']':
+                j += 1
+            while j < n and component[j] != ']':
+                j += 1
+            if j >= n:
+                parts.append('\\[')
+            else:
+                stuff = component[i:j].replace('\\', '\\\\')
+                # Escape regex set operations and a leading '[', as fnmatch does
+                stuff = re.sub(r'([&~|])', r'\\\1', stuff)
+                if stuff.startswith('!'):
+                    stuff = '^' + stuff[1:]
+                elif stuff[0] in '^[':
+                    stuff = '\\' + stuff
+                parts.append(f'[{stuff}]')
+                i = j + 1
+        else:
+            parts.append(re.escape(c))
+    return ''.join(parts)
+
+
+@lru_cache(maxsize=128)
+def compile_patterns(pattern_input: str) -> Optional[Pattern[str]]:
+    """Compile semicolon-separated glob patterns into a single regex.
+    
+    Patterns follow Path.match semantics: relative patterns match from the
+    right of the path, absolute patterns must match the whole path. Search
+    the result against a POSIX-style path string.
+    
+    Args:
+        pattern_input: Semicolon-separated list of glob patterns
+        
+    Returns:
+        Optional[Pattern[str]]: Union regex of all patterns, or None if there are none
+    """
+    alternatives = []
+    for pattern in (p.strip() for p in pattern_input.split(';')):
+        if not pattern:
+            continue
+        pure = PurePath(pattern)
+        components = [_glob_component_to_regex(part) for part in pure.parts[1 if pure.anchor else 0:]]
+        if pure.anchor:
+            prefix = '^' + re.escape(pure.anchor.replace('\\', '/'))
+        else:
+            prefix = '(?:^|/)'
+        alternatives.append(prefix + '/'.join(components) + '$')
+    if not alternatives:
+        return None
+    flags = re.IGNORECASE if os.name == 'nt' else 0
+    return re.compile('|'.join(f'(?:{alt})' for alt in alternatives), flags)
+
+
 def matches_pattern(file_path: Union[str, Path], pattern_input: str) -> bool:
     """Check if a file matches any of the provided patterns.
     
@@ -19,21 +103,88 @@ def matches_pattern(file_path: Union[str, Path], pattern_input: str) -> bool:
     if not pattern_input:
         return False
         
-    patterns = [p.strip() for p in pattern_input.split(';') if p.strip()]
-    if not patterns:
+    regex = compile_patterns(pattern_input)
+    if regex is None:
         return False
         
     path_obj = Path(file_path) if isinstance(file_path, str) else file_path
-    for pattern in patterns:
+    return regex.search(path_obj.as_posix()) is not None
+
+
+def _scan_dir(
+    path: Path, skip_dirs: AbstractSet[str]
+) -> Tuple[List[Tuple[Path, "os.stat_result"]], List[Path]]:
+    """List one directory, skipping hidden entries.
+
+    One lstat per entry gives both its type and its size. Symlinked
+    directories count as files, so they are never descended into.
+
+    Returns:
+        Tuple of ((path, lstat result) for each non-directory, subdirectories to descend into)
+    """
+    files = []
+    subdirs = []
+    try:
+        children = list(path.iterdir())
+    except (FileNotFoundError, PermissionError, NotADirectoryError) as e:
+        logger.warning(f"Skipping unreadable directory {path}: {e}")
+        return files, subdirs
+    for child in children:
+        if child.name.startswith('.'):
+            continue
         try:
-            if path_obj.match(pattern):
-                return True
-        except Exception as e:
-            logger.warning(f"Error matching pattern '{pattern}' against '{path_obj}': {e}")
+            st = child.lstat()
+        except FileNotFoundError:
+            continue  # Removed during the scan
+        except OSError as e:
+            logger.warning(f"Error checking size of {child}: {e}")
             continue
-    return False
+        if stat.S_ISDIR(st.st_mode):
+            if child.name not in skip_dirs:
+                subdirs.append(child)
+        else:
+            files.append((child, st))
+    return files, subdirs
+
 
-def gather_filtered_files(base_dir: str, max_size_kb: int, pattern_mode: str, pattern_input: str) -> List[str]:
+def _walk_files(
+    path: Path, skip_dirs: AbstractSet[str] = frozenset(), threads: int = 0
+) -> Iterator[Tuple[Path, "os.stat_result"]]:
+    """Yield (path, lstat result) for the non-directories below path, skipping hidden entries.
+
+    Hidden directories are pruned before they are listed, and so are the
+    directories directly under path named in skip_dirs; deeper directories
+    with those names are walked. With threads, each depth level's
+    directories are listed concurrently, so on a network filesystem the
+    round trips of one level overlap instead of adding up; local disks are
+    faster walked serially.
+    """
+    files, subdirs = _scan_dir(path, skip_dirs)
+    yield from files
+    if threads <= 1:
+        for subdir in subdirs:
+            yield from _walk_files(subdir)
+        return
+    level = subdirs
+    with ThreadPoolExecutor(max_workers=threads, thread_name_prefix="walk") as pool:
+        while level:
+            next_level = []
+            for files, subdirs in pool.map(_scan_dir, level, repeat(frozenset())):
+                yield from files
+                next_level.extend(subdirs)
+            level = next_level
+
+
+def gather_filtered_files(
+    base_dir: str,
+    max_size_kb: int,
+    pattern_mode: str,
+    pattern_input: str,
+    root_stat: Optional["os.stat_result"] = None,
+    max_files: Optional[int] = None,
+    skip_dirs: AbstractSet[str] = frozenset(),
+    walk_threads: int = 0,
+) -> List[str]:
     """Gather files from a directory recursively, applying size and pattern filters.
     
     Args:
@@ -41,50 +192,69 @@ def gather_filtered_files(base_dir: str, max_size_kb: int, pattern_mode: str, pa
         max_size_kb: Maximum file size in KB (files larger than this are excluded)
         pattern_mode: Either 'exclude' or 'include'
         pattern_input: Semicolon-separated list of glob patterns
+        root_stat: Stat result the caller already has for base_dir, saving a re-check
+        max_files: Stop scanning once more than this many files match (no limit if None)
+        skip_dirs: Names of top-level directories not descended into, in addition
+            to hidden directories at any depth
+        walk_threads: List each depth level's directories with this many threads;
+            worth it only on high-latency (network) filesystems. Serial if 0 or 1
         
     Returns:
         List[str]: List of filtered file paths
+
+    Raises:
+        TooManyFilesError: If more than max_files files match
     """
     filtered_files = []
     max_size_bytes = max_size_kb * 1024
+    pattern = compile_patterns(pattern_input)  # Compiled once for the whole scan
     
     try:
         base_path = Path(base_dir)
-        if not base_path.exists():
-            raise IOError(f"Directory not found: {base_dir}")
-        if not base_path.is_dir():
+        if root_stat is None:
+            if not base_path.exists():
+                raise IOError(f"Directory not found: {base_dir}")
+            if not base_path.is_dir():
+                raise IOError(f"Not a directory: {base_dir}")
+        elif not stat.S_ISDIR(root_stat.st_mode):
             raise IOError(f"Not a directory: {base_dir}")
-            
-        for p in base_path.rglob('*'):
-            if not p.is_file():
-                continue
-                
-            # Skip hidden files and common ignore patterns
-            if any(part.startswith('.') for part in p.parts):
+
+        # Walk the resolved base: symlinked directories are never descended into,
+        # so every entry path is already resolved, outside of symlinked files
+        for p, st in _walk_files(base_path.resolve(), skip_dirs, walk_threads):
+            # Only symlinks need more than the walk's lstat
+            if stat.S_ISLNK(st.st_mode):
+                try:
+                    st = p.stat()
+                    p = p.resolve()
+                except FileNotFoundError:
+                    continue  # Broken symlink or removed during the scan
+                except OSError as e:
+                    logger.warning(f"Error checking size of {p}: {e}")
+                    continue
+            if not stat.S_ISREG(st.st_mode):
                 continue
                 
             # Check file size
-            try:
-                if p.stat().st_size > max_size_bytes:
-                    logger.debug(f"Skipping {p}: exceeds size limit of {max_size_kb}KB")
-                    continue
-            except OSError as e:
-                logger.warning(f"Error checking size of {p}: {e}")
+            if st.st_size > max_size_bytes:
+                logger.debug("Skipping %s: exceeds size limit of %sKB", p, max_size_kb)
                 continue
             
             # Check pattern match
-            str_path = str(p.resolve())
-            matches = matches_pattern(str_path, pattern_input)
+            str_path = str(p)
+            matches = pattern is not None and pattern.search(p.as_posix()) is not None
             
             # Include/exclude based on pattern_mode
             if pattern_mode == "exclude" and matches:
-                logger.debug(f"Skipping {p}: matches exclude pattern")
+                logger.debug("Skipping %s: matches exclude pattern", p)
                 continue
             elif pattern_mode == "include" and not matches and pattern_input:
-                logger.debug(f"Skipping {p}: doesn't match include pattern")
+                logger.debug("Skipping %s: doesn't match include pattern", p)
                 continue
                 
             filtered_files.append(str_path)
+            if max_files is not None and len(filtered_files) > max_files:
+                raise TooManyFilesError(max_files)
                     
         logger.info(f"Found {len(filtered_files)} files in {base_dir} after filtering")
     except Exception as e:
@@ -1,14 +1,47 @@
-from flask import Flask, request, send_file, jsonify, send_from_directory
+from flask import Flask, Request, Response, request, send_file, jsonify, send_from_directory, url_for
 from pathlib import Path
+import io
+import json
 import os
+import queue
 import sys
-import uuid
+import hashlib
+import secrets
+import heapq
+import shutil
 import socket
+import stat
+import subprocess
+import tempfile
 import threading
-from datetime import datetime
+import time
+import zipfile
+import atexit
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, replace
 import logging
-from typing import Dict, Optional, List, TypedDict, Union
+import mimetypes
+from typing import Any, BinaryIO, Callable, Dict, Mapping, Optional, List, Tuple, TypedDict, Union
 from werkzeug.datastructures import FileStorage
+from werkzeug.exceptions import NotFound, RequestEntityTooLarge, ServiceUnavailable
+from werkzeug.utils import secure_filename
+from flask.json.provider import DefaultJSONProvider
+
+# Optional production WSGI server
+try:
+    from waitress import serve as waitress_serve
+    HAS_WAITRESS = True
+except ImportError:
+    waitress_serve = None
+    HAS_WAITRESS = False
+
+# Optional faster JSON encoder for API responses
+try:
+    import orjson
+    HAS_ORJSON = True
+except ImportError:
+    orjson = None
+    HAS_ORJSON = False
 
 # Configure logging
 logging.basicConfig(
@@ -27,298 +60,1067 @@ for logger_name in ['werkzeug', 'flask', 'flask.app']:
     log.handlers = []
     log.propagate = True
 
-# Set Flask environment variables for production mode
-os.environ['FLASK_DEBUG'] = '0'
-os.environ['FLASK_ENV'] = 'production'
+# Variables exported by the shell, which take precedence over .env
+_SHELL_ENV_KEYS = frozenset(os.environ)
 
 logger = logging.getLogger(__name__)
 
-from utils import matches_pattern, gather_filtered_files
-from file2ai import convert_document, clone_and_export, local_export, setup_logging
+
+def load_env_file():
+    """Load environment variables from .env file if it exists.
+
+    Values already exported by the shell are kept. The werkzeug reloader's
+    child process inherits the parent's environment, so it skips the file.
+    """
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        return
+    env_path = Path(__file__).parent / '.env'
+    try:
+        text = env_path.read_text()  # One open and read; a missing file is the common case
+    except FileNotFoundError:
+        return
+    logger.info("Loading environment from .env file")
+    pairs = (line.partition('=') for line in map(str.strip, text.splitlines())
+             if line and line[0] != '#')
+    os.environ.update({
+        key.strip(): value.strip()
+        for key, sep, value in pairs if sep and key.strip() not in _SHELL_ENV_KEYS
+    })
+
+
+# Load .env before the settings below read their FILE2AI_* variables
+load_env_file()
+
+from utils import compile_patterns, gather_filtered_files
+from file2ai import (
+    PRUNED_DIRS,
+    clone_and_export,
+    load_gitignore_patterns,
+    local_export,
+    setup_logging,
+)
 from argparse import Namespace
 
 logger = logging.getLogger(__name__)
 
 
-class ConversionOptions(TypedDict, total=False):
-    format: str
-    pages: Optional[str]
-    brightness: Union[str, float]
-    contrast: Union[str, float]
-    resolution: Union[str, int]
-    repo_url: Optional[str]
-    branch: Optional[str]
-    token: Optional[str]
-    local_dir: Optional[str]
-    subdir: Optional[str]
-    max_file_size_kb: Union[str, int]
-    pattern_mode: str  # "exclude" | "include"
-    pattern_input: str
+CONVERT_FORMATS = ("text", "pdf", "html", "docx", "xlsx", "pptx")
+
+
+@dataclass(frozen=True)
+class JobOptions:
+    """Validated options for a conversion or export job.
+
+    Immutable, so worker threads can share it without locking.
+    """
+    format: str = "text"
+    pages: str = ""
+    brightness: float = 1.0
+    contrast: float = 1.0
+    resolution: int = 300
+    repo_url: Optional[str] = None
+    branch: Optional[str] = None
+    token: Optional[str] = None
+    local_dir: Optional[str] = None
+    subdir: Optional[str] = None
+    max_file_size_kb: int = 50
+    pattern_mode: str = "exclude"  # "exclude" | "include"
+    pattern_input: str = ""
+    fail_fast: bool = False
+
+    @classmethod
+    def from_form(cls, form: Mapping[str, Any], command: str) -> "JobOptions":
+        """Parse and validate job options from submitted form data.
+
+        Args:
+            form: Request form data
+            command: Type of operation ('convert' or 'export')
+
+        Returns:
+            JobOptions: Options with all numeric fields coerced
+
+        Raises:
+            ValueError: If any option is malformed or out of range
+        """
+        try:
+            max_file_size_kb = int(form.get("max_file_size_kb", "50"))
+            if max_file_size_kb <= 0:
+                raise ValueError("max_file_size_kb must be positive")
+        except ValueError as e:
+            raise ValueError(f"Invalid max_file_size_kb: {str(e)}")
+
+        pattern_mode = form.get("pattern_mode", "exclude")
+        if pattern_mode not in ("exclude", "include"):
+            raise ValueError("pattern_mode must be 'exclude' or 'include'")
+
+        fmt = form.get("format", "text")
+        if command == "convert" and fmt not in CONVERT_FORMATS:
+            raise ValueError(
+                "Invalid format: %s. Valid formats are: %s" % (fmt, ", ".join(CONVERT_FORMATS))
+            )
+
+        try:
+            brightness = float(form.get("brightness", "1.0"))
+            contrast = float(form.get("contrast", "1.0"))
+            resolution = int(form.get("resolution", "300"))
+
+            if not (0.1 <= brightness <= 2.0):
+                raise ValueError("Brightness must be between 0.1 and 2.0")
+            if not (0.1 <= contrast <= 2.0):
+                raise ValueError("Contrast must be between 0.1 and 2.0")
+            if not (72 <= resolution <= 1200):
+                raise ValueError("Resolution must be between 72 and 1200 DPI")
+        except ValueError as e:
+            raise ValueError("Invalid conversion parameters: %s" % str(e))
+
+        return cls(
+            format=fmt,
+            pages=form.get("pages", ""),
+            brightness=brightness,
+            contrast=contrast,
+            resolution=resolution,
+            repo_url=form.get("repo_url") or None,
+            branch=form.get("branch") or None,
+            token=form.get("token") or None,
+            subdir=form.get("subdir") or None,
+            max_file_size_kb=max_file_size_kb,
+            pattern_mode=pattern_mode,
+            pattern_input=form.get("pattern_input", ""),
+            fail_fast=form.get("fail_fast", "").lower() in ("1", "true", "yes"),
+        )
 
 
 class JobStatus(TypedDict):
     status: str
     progress: float
     errors: List[str]
-    start_time: datetime
+    start_time: float  # time.monotonic(), only compared against other readings
     output_files: List[Path]
+    preview_file: Optional[Path]  # Output /preview shows, set when the job finishes
+    future: Optional[Future]
+
+
+def job_state(job: JobStatus) -> Tuple[str, float, int]:
+    """Return the parts of a job's status that clients observe."""
+    return job["status"], job["progress"], len(job["errors"])
+
+
+class JobRegistry:
+    """Thread-safe job store, sharded by job ID.
+
+    Request threads, workers and status polls for different jobs take
+    different locks, so frequent polling doesn't serialize on one lock.
+    Every change notifies the shard's condition, which wait() uses to
+    push updates to event-stream clients.
+    """
+
+    def __init__(self, shards: int = 16):
+        self._shards = [({}, threading.Condition()) for _ in range(shards)]
+
+    def _shard(self, job_id: str) -> Tuple[Dict[str, JobStatus], threading.Condition]:
+        return self._shards[hash(job_id) % len(self._shards)]
+
+    @staticmethod
+    def _snapshot(job: JobStatus) -> JobStatus:
+        snapshot = JobStatus(**job)
+        snapshot["errors"] = list(job["errors"])
+        return snapshot
+
+    def get(self, job_id: str) -> Optional[JobStatus]:
+        """Return a snapshot of a job's status, or None if the job is unknown."""
+        jobs, lock = self._shard(job_id)
+        with lock:
+            job = jobs.get(job_id)
+            return None if job is None else self._snapshot(job)
+
+    def wait(self, job_id: str, seen: Optional[Tuple], timeout: float) -> Optional[JobStatus]:
+        """Block until a job's state differs from seen, then return a snapshot.
+
+        Args:
+            job_id: Unique identifier for the job
+            seen: The job_state() last reported to the caller, or None
+            timeout: Seconds to wait before returning the unchanged snapshot
+
+        Returns:
+            Optional[JobStatus]: Snapshot of the job, or None once it has been removed
+        """
+        jobs, cond = self._shard(job_id)
+        with cond:
+            cond.wait_for(
+                lambda: job_id not in jobs or job_state(jobs[job_id]) != seen, timeout
+            )
+            job = jobs.get(job_id)
+            return None if job is None else self._snapshot(job)
+
+    def put(self, job_id: str, status: JobStatus) -> None:
+        """Register a job, replacing any job with the same ID."""
+        jobs, cond = self._shard(job_id)
+        with cond:
+            jobs[job_id] = status
+            cond.notify_all()
+
+    def setdefault(self, job_id: str, status: JobStatus) -> JobStatus:
+        """Register a job unless it exists, returning the stored (live) status."""
+        jobs, cond = self._shard(job_id)
+        with cond:
+            job = jobs.setdefault(job_id, status)
+            cond.notify_all()
+            return job
+
+    def update(self, job_id: str, error: Optional[str] = None, only_if=None, **fields) -> bool:
+        """Update fields of a job and optionally record an error message.
+
+        Updates for jobs that have already been removed are ignored, as are
+        updates whose only_if(job) check fails; the check runs under the same
+        lock as the update, so check-then-set callers can't race each other.
+
+        Returns:
+            bool: Whether the update was applied
+        """
+        jobs, cond = self._shard(job_id)
+        with cond:
+            job = jobs.get(job_id)
+            if job is None or (only_if is not None and not only_if(job)):
+                return False
+            job.update(fields)
+            if error is not None:
+                job["errors"].append(error)
+            cond.notify_all()
+            return True
+
+    def pop(self, job_id: str) -> Optional[JobStatus]:
+        """Remove a job, returning the removed job."""
+        jobs, cond = self._shard(job_id)
+        with cond:
+            job = jobs.pop(job_id, None)
+            cond.notify_all()
+            return job
+
+    def matching(self, predicate) -> List[str]:
+        """Return the IDs of jobs for which predicate(job) is true, one shard at a time."""
+        found = []
+        for jobs, lock in self._shards:
+            with lock:
+                found.extend(job_id for job_id, job in jobs.items() if predicate(job))
+        return found
+
+    def oldest(self, count: int, predicate) -> List[str]:
+        """Return the IDs of up to count jobs matching predicate, earliest started first."""
+        found = []
+        for jobs, lock in self._shards:
+            with lock:
+                found.extend(
+                    (job["start_time"], job_id) for job_id, job in jobs.items() if predicate(job)
+                )
+        return [job_id for _, job_id in heapq.nsmallest(count, found)]
+
+    def __len__(self) -> int:
+        total = 0
+        for jobs, lock in self._shards:
+            with lock:
+                total += len(jobs)
+        return total
 
 
-from file2ai import EXPORTS_DIR, UPLOADS_DIR, FRONTEND_DIR, prepare_exports_dir
+from file2ai import EXPORTS_DIR, UPLOADS_DIR, FRONTEND_DIR
 
 app = Flask(__name__, static_folder=FRONTEND_DIR, static_url_path='')
-app.secret_key = os.urandom(24)  # For flash messages
+# Production defaults live here rather than in os.environ, which the werkzeug
+# reloader's child would inherit; the development server turns debug back on
+app.config['DEBUG'] = False
+# For flash messages; set FLASK_SECRET_KEY so signed cookies survive restarts
+app.secret_key = os.environ.get("FLASK_SECRET_KEY") or os.urandom(24)
+
+# Uploads up to this size stay in memory and larger ones spill to disk.
+# Each file in each concurrent request gets its own buffer, so keep it small;
+# spilled ones are written to UPLOADS_DIR and staged by renaming, never copied.
+UPLOAD_SPOOL_BYTES = int(os.getenv("FILE2AI_SPOOL_KB", 1024)) * 1024
+
+
+class _FileTooLarge(RequestEntityTooLarge):
+    """A single uploaded file is larger than MAX_FILE_SIZE."""
+
+    def __init__(self, filename: Optional[str]):
+        super().__init__(f"File {filename} exceeds maximum size of {MAX_FILE_SIZE // (1024 * 1024)}MB")
+
+
+class _SpoolFailed(ServiceUnavailable):
+    """An upload could not be spooled to disk, e.g. because UPLOADS_DIR is full."""
+
+    def __init__(self, filename: Optional[str], error: OSError):
+        super().__init__(f"Could not store upload {filename}: {error.strerror or error}")
+
+
+# Name prefix of rolled-over upload buffers in UPLOADS_DIR; ones untouched for
+# SPOOL_STALE_SECONDS are left over from an interrupted server and removed at start-up
+_SPOOL_PREFIX = ".spool-"
+SPOOL_STALE_SECONDS = 3600
+
+
+class _LimitedSpool(io.IOBase):
+    """Upload buffer that stops the multipart parse once its file passes MAX_FILE_SIZE.
+
+    Uploads are buffered in memory up to UPLOAD_SPOOL_BYTES and then roll over
+    to a named file in UPLOADS_DIR, so staging can rename it into place instead
+    of copying it. The buffer is owned here rather than borrowed from
+    SpooledTemporaryFile, whose rollover has no public hook for a named file.
+    """
+
+    def __init__(self, filename: Optional[str]):
+        self._filename = filename
+        self.size = 0  # Bytes received so far; exact once the part is parsed
+        self._file: BinaryIO = io.BytesIO()
+        self._spool_path: Optional[str] = None
+
+    def readable(self) -> bool:
+        return True
+
+    def writable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def write(self, s) -> int:
+        self.size += len(s)
+        if self.size > MAX_FILE_SIZE:
+            self.close()
+            raise _FileTooLarge(self._filename)
+        try:
+            if self._spool_path is None and self.size > UPLOAD_SPOOL_BYTES:
+                self._rollover()
+            return self._file.write(s)
+        except OSError as e:
+            self.close()
+            raise _SpoolFailed(self._filename, e)
+
+    def _rollover(self) -> None:
+        """Move the buffered bytes to a spool file in UPLOADS_DIR and keep writing there."""
+        fd, self._spool_path = tempfile.mkstemp(prefix=_SPOOL_PREFIX, dir=UPLOADS_PATH)
+        spool = open(fd, "rb+")
+        try:
+            spool.write(self._file.getbuffer())
+        except OSError:
+            spool.close()
+            raise
+        self._file = spool
+
+    def read(self, size: int = -1) -> bytes:
+        return self._file.read(size)
+
+    def readinto(self, buffer) -> int:
+        return self._file.readinto(buffer)
+
+    def readline(self, size: int = -1) -> bytes:
+        return self._file.readline(size)
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def flush(self) -> None:
+        if not self._file.closed:
+            self._file.flush()
+
+    def move_to(self, path: Path) -> bool:
+        """Rename the spooled file to path; False if the upload is still in memory."""
+        if self._spool_path is None:
+            return False
+        self._file.flush()
+        os.replace(self._spool_path, path)
+        self._spool_path = None
+        return True
+
+    def close(self) -> None:
+        if self.closed:
+            return
+        super().close()
+        self._file.close()
+        # Remove the spool file unless staging already moved it into place
+        if self._spool_path is not None:
+            try:
+                os.unlink(self._spool_path)
+            except FileNotFoundError:
+                pass
+            self._spool_path = None
+
+
+class _SpoolingRequest(Request):
+    """Request whose file uploads spool to disk only above UPLOAD_SPOOL_BYTES."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        # Reject a declared oversize part before reading any of it
+        if content_length is not None and content_length > MAX_FILE_SIZE:
+            raise _FileTooLarge(filename)
+        return _LimitedSpool(filename)
+
+
+app.request_class = _SpoolingRequest
+
+
+class _ORJSONProvider(DefaultJSONProvider):
+    """JSON provider that encodes with orjson, keeping Flask's sorted keys and fallbacks."""
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=self.default, option=option).decode()
+
+    def loads(self, s: Union[str, bytes], **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
+if HAS_ORJSON:
+    app.json = _ORJSONProvider(app)
+
+# Let browsers cache frontend assets and revalidate them with conditional requests
+STATIC_MAX_AGE = 3600
+app.config['SEND_FILE_MAX_AGE_DEFAULT'] = STATIC_MAX_AGE
+
+# Refuse oversized request bodies before they are read or spooled (0 disables the limit)
+MAX_UPLOAD_KB = int(os.getenv("FILE2AI_MAX_UPLOAD_KB", 100000))
+app.config['MAX_CONTENT_LENGTH'] = MAX_UPLOAD_KB * 1024 or None
+
+# Behind a proxy that understands X-Sendfile, let it stream downloads instead of Python
+app.config['USE_X_SENDFILE'] = os.getenv("FILE2AI_USE_X_SENDFILE", "0").lower() in ("1", "true", "yes")
+
+# Frontend files larger than this are left on disk and sent by send_from_directory
+FRONTEND_PRELOAD_MAX_BYTES = 1024 * 1024
+
+
+def _load_frontend_assets() -> Dict[str, Tuple[bytes, str, str]]:
+    """Read the frontend's files into memory, keyed by URL path.
+
+    Returns:
+        Dictionary of URL path -> (content, MIME type, ETag)
+    """
+    root = Path(app.root_path) / FRONTEND_DIR
+    assets = {}
+    try:
+        for path in root.rglob("*"):
+            if not path.is_file() or path.stat().st_size > FRONTEND_PRELOAD_MAX_BYTES:
+                continue
+            content = path.read_bytes()
+            mimetype = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+            etag = hashlib.blake2b(content, digest_size=8).hexdigest()
+            assets[path.relative_to(root).as_posix()] = (content, mimetype, etag)
+    except OSError as e:
+        logger.warning(f"Could not preload frontend assets: {e}")
+    return assets
+
+
+# The frontend is a handful of small files served on every page load, so keep
+# them in memory with their MIME types and ETags worked out once
+FRONTEND_ASSETS = _load_frontend_assets()
+
+# Directory paths, built once and reused for every job. Uploads are absolute so
+# staged inputs need no resolving; outputs stay relative, because
+# convert_document only keeps an output path that lies under a relative exports/
+UPLOADS_PATH = Path(UPLOADS_DIR).absolute()
+EXPORTS_PATH = Path(EXPORTS_DIR)
 
 # Set up directories with proper permissions
 directories = {
-    'uploads': Path(UPLOADS_DIR),
-    'exports': Path(EXPORTS_DIR),
+    'uploads': UPLOADS_PATH,
+    'exports': EXPORTS_PATH,
     'frontend': Path(FRONTEND_DIR)
 }
 
-# Ensure required directories exist with proper permissions
-prepare_exports_dir()  # Use the existing function from file2ai.py
 
-# Set up directories with proper permissions
+def _ensure_writable_dir(path: Path) -> None:
+    """Create a directory if needed and prove it is writable by writing to it.
+
+    A real write catches read-only mounts and ACLs that os.access() can miss.
+    TemporaryFile uses O_TMPFILE where available, so no name is ever created.
+    """
+    path.mkdir(parents=True, exist_ok=True, mode=0o755)
+    with tempfile.TemporaryFile(dir=path):
+        pass
+
+
 for name, path in directories.items():
     try:
-        # Create directory with proper permissions
-        path.mkdir(exist_ok=True, mode=0o755)
-        # Verify directory exists and is writable
-        if not path.exists():
-            raise IOError(f"Failed to create directory: {path}")
-        if not os.access(str(path), os.W_OK):
-            raise IOError(f"Directory not writable: {path}")
-        logger.info(f"Created/verified directory: {path}")
+        _ensure_writable_dir(path)
+        logger.info("Created/verified directory: %s", path)
     except Exception as e:
         logger.error(f"Failed to create {name} directory: {e}")
         sys.exit(1)
 
-# Global job tracking
-conversion_jobs = {}
-job_events = {}
+
+def _remove_stale_spools(max_age: float = SPOOL_STALE_SECONDS) -> None:
+    """Delete upload spool files left in UPLOADS_DIR by a server that stopped mid-upload.
+
+    Spools modified within max_age seconds are left alone, since they may
+    belong to an upload another server process sharing UPLOADS_DIR is receiving.
+    """
+    cutoff = time.time() - max_age
+    for path in UPLOADS_PATH.glob(_SPOOL_PREFIX + "*"):
+        try:
+            if path.stat().st_mtime < cutoff:
+                path.unlink()
+                logger.info("Removed stale upload spool %s", path.name)
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            logger.warning("Could not remove stale upload spool %s: %s", path.name, e)
+
+
+_remove_stale_spools()
+
+# Upload security limits
+MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB limit
+SUSPICIOUS_EXTENSIONS = frozenset({'.exe', '.bat', '.cmd', '.sh', '.js', '.php', '.py'})
+# Valid file extensions for conversion and their MIME types
+VALID_CONVERT_TYPES = {
+    '.txt': 'text/plain',
+    '.pdf': 'application/pdf',
+    '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
+    '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+    '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
+    '.html': 'text/html',
+    '.htm': 'text/html'
+}
+
+# MIME types accepted for every allowed upload extension, used to catch spoofed uploads
+_EXT_TO_MIMES = {
+    **{ext: frozenset({mime}) for ext, mime in VALID_CONVERT_TYPES.items()},
+    '.pdf': frozenset({'application/pdf', 'application/x-pdf'}),
+    '.doc': frozenset({'application/msword'}),
+    '.xls': frozenset({'application/vnd.ms-excel'}),
+    '.ppt': frozenset({'application/vnd.ms-powerpoint'}),
+}
+# Extensions accepted by the upload endpoint, derived so the two tables can't drift
+ALLOWED_EXTENSIONS = frozenset(_EXT_TO_MIMES)
+
+# Chunk size used when streaming uploads to disk
+UPLOAD_BUFFER_SIZE = 64 * 1024
+
+# Staged uploads never follow a symlink planted at their path, and their
+# descriptors are not inherited by converter child processes
+_UPLOAD_OPEN_FLAGS = (
+    os.O_WRONLY | os.O_CREAT | os.O_TRUNC
+    | getattr(os, "O_NOFOLLOW", 0) | getattr(os, "O_CLOEXEC", 0) | getattr(os, "O_BINARY", 0)
+)
+
+# Global job tracking, shared by request and worker threads
+conversion_jobs = JobRegistry()
+
+# Bounded pool of background workers for CPU-bound conversion jobs
+JOB_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("FILE2AI_WORKERS", os.cpu_count() or 4)),
+    thread_name_prefix="job"
+)
+atexit.register(JOB_POOL.shutdown, wait=False)
+
+# Exports mostly wait on git and the network, so a slow clone gets its own pool
+# and never holds up conversions
+EXPORT_POOL = ThreadPoolExecutor(
+    max_workers=int(os.getenv("FILE2AI_EXPORT_WORKERS", 8)),
+    thread_name_prefix="export"
+)
+atexit.register(EXPORT_POOL.shutdown, wait=False)
+
+# Jobs queued or running per pool; past this, new jobs get 503 instead of piling
+# up staged uploads in an unbounded queue (0 queues without limit)
+MAX_PENDING_JOBS = int(os.getenv("FILE2AI_MAX_PENDING_JOBS", 64))
+_pending_lock = threading.Lock()
+_pending_jobs = {JOB_POOL: 0, EXPORT_POOL: 0}
+
+# Local exports stop scanning once a directory has more matching files than this
+MAX_EXPORT_FILES = int(os.getenv("FILE2AI_MAX_FILES", 50000))
+# Threads listing directories during that scan; only helps on network filesystems,
+# where each directory read waits on a round trip (0 scans serially)
+EXPORT_WALK_THREADS = int(os.getenv("FILE2AI_WALK_THREADS", 0))
+
+# Conversions run in a child interpreter: they use every core instead of sharing
+# our GIL, and a converter that crashes or calls sys.exit() can't take the server down
+CONVERT_TIMEOUT_SECONDS = int(os.getenv("FILE2AI_CONVERT_TIMEOUT", 300))
+# Caps converter processes across all jobs, so concurrent jobs can't oversubscribe
+# the CPU; half the cores by default, leaving the rest to request handling and exports
+CONVERT_PROCESSES = int(os.getenv("FILE2AI_CONVERT_PROCESSES", max(1, (os.cpu_count() or 2) // 2)))
+_convert_slots = threading.BoundedSemaphore(CONVERT_PROCESSES)
+
+# Upper bound on files converted in parallel within a single job; more threads than
+# converter slots would only wait on the semaphore
+CONVERT_WORKERS = min(8, CONVERT_PROCESSES)
+
+# Files one converter process handles in turn, paying interpreter start-up and the
+# converter's imports once per batch instead of once per file
+CONVERT_BATCH_SIZE = 32
+
+# Converter child: convert_worker reads one JSON argument set per stdin line and
+# answers each with a JSON line on stdout, null on success or the error message.
+# PYTHONPATH lets it import itself and file2ai from next to this file, whatever the cwd
+_CONVERT_ENV = dict(
+    os.environ,
+    PYTHONPATH=os.pathsep.join(
+        filter(None, [os.path.dirname(os.path.abspath(__file__)), os.getenv("PYTHONPATH")])
+    ),
+)
+
+# Finished jobs are evicted this long after they started
+TERMINAL_STATUSES = frozenset({"completed", "completed_with_errors", "failed"})
+JOB_TTL_SECONDS = int(os.getenv("FILE2AI_JOB_TTL", 3600))
+JOB_JANITOR_INTERVAL = 60
+
+# Upper bound on jobs kept in memory; past it the oldest finished jobs are evicted
+# early, down to JOB_EVICT_LOW_WATER so bursts don't trigger a scan per request
+MAX_JOBS = int(os.getenv("FILE2AI_MAX_JOBS", 1000))
+JOB_EVICT_LOW_WATER = int(MAX_JOBS * 0.9)
+
+# Idle /events streams send a keep-alive comment this often
+EVENT_KEEPALIVE_SECONDS = 15.0
+
+# Each open /events stream holds a WSGI thread for the life of its job, so cap them
+# below FILE2AI_WSGI_THREADS to keep threads free for uploads and downloads
+MAX_EVENT_STREAMS = int(os.getenv("FILE2AI_MAX_EVENT_STREAMS", 8))
+_event_stream_slots = threading.BoundedSemaphore(MAX_EVENT_STREAMS)
+
+
+# Shorthands used by the routes and workers
+_get_job = conversion_jobs.get
+_set_job = conversion_jobs.put
+_update_job = conversion_jobs.update
+_pop_job = conversion_jobs.pop
+
+
+def _remove_output_files(job_id: str) -> None:
+    """Delete a job's output directory and every file in it."""
+    # Every output, partial or not, lives in the job's own directory
+    shutil.rmtree(EXPORTS_PATH / job_id, ignore_errors=True)
+
+
+def _evict_expired_jobs() -> None:
+    """Periodically remove finished jobs older than JOB_TTL_SECONDS."""
+    while True:
+        time.sleep(JOB_JANITOR_INTERVAL)
+        cutoff = time.monotonic() - JOB_TTL_SECONDS
+        _evict_jobs(conversion_jobs.matching(
+            lambda job: job["status"] in TERMINAL_STATUSES and job["start_time"] < cutoff
+        ))
+
+
+def _evict_jobs(job_ids: List[str]) -> None:
+    """Remove jobs and their output files."""
+    for job_id in job_ids:
+        job = _pop_job(job_id)
+        if job is not None:
+            _remove_output_files(job_id)
+            logger.info("Evicted job %s", job_id)
+
+
+def _enforce_job_limit() -> None:
+    """Evict the oldest finished jobs once MAX_JOBS jobs are held in memory."""
+    total = len(conversion_jobs)
+    if total < MAX_JOBS:
+        return
+    _evict_jobs(conversion_jobs.oldest(
+        total - JOB_EVICT_LOW_WATER, lambda job: job["status"] in TERMINAL_STATUSES
+    ))
+
+
+threading.Thread(target=_evict_expired_jobs, name="job-janitor", daemon=True).start()
+
+# Recently stat'ed export directories, so retried submissions skip the stat
+STAT_CACHE_TTL = 5.0
+STAT_CACHE_MAX = 256
+_stat_cache: Dict[str, Tuple[float, os.stat_result]] = {}
+_stat_cache_lock = threading.Lock()
+
+
+def _cached_stat(path: str, ttl: float = STAT_CACHE_TTL) -> Optional[os.stat_result]:
+    """Return os.stat(path), or None if it doesn't exist, reusing results for ttl seconds.
+
+    Misses are never cached, so a directory created after a failed
+    submission is picked up on the next one.
+    """
+    now = time.monotonic()
+    with _stat_cache_lock:
+        cached = _stat_cache.get(path)
+        if cached is not None and now - cached[0] <= ttl:
+            return cached[1]
+    try:
+        st = os.stat(path)
+    except OSError:
+        with _stat_cache_lock:
+            _stat_cache.pop(path, None)
+        return None
+    with _stat_cache_lock:
+        if len(_stat_cache) >= STAT_CACHE_MAX:
+            _stat_cache.clear()  # Entries are only seconds old; just start over
+        _stat_cache[path] = (now, st)
+    return st
+
+
+def _upload_size(file_data: FileStorage) -> int:
+    """Return the size of an upload in bytes without reading its content.
+
+    Uploads parsed into a _LimitedSpool report the bytes it counted while
+    they were written, with no syscall. Otherwise uses the part's
+    Content-Length when the client sent one, then the buffer of an
+    in-memory stream, and only then seeks to the end of the stream.
+    """
+    stream = file_data.stream
+    if isinstance(stream, _LimitedSpool):
+        return stream.size
+    if file_data.content_length:
+        return file_data.content_length
+    if isinstance(stream, io.BytesIO):
+        return stream.getbuffer().nbytes
+    position = stream.tell()
+    size = stream.seek(0, os.SEEK_END)  # seek() returns the new offset, no tell() needed
+    stream.seek(position)
+    return size
+
+
+def _save_upload(file_data: FileStorage, fd: int) -> None:
+    """Write an in-memory upload to an open file descriptor in buffered chunks.
+
+    Uploads that spilled to disk never get here: staging renames their
+    spool file into place instead.
+    """
+    with os.fdopen(os.dup(fd), "wb") as dst:
+        file_data.save(dst, buffer_size=UPLOAD_BUFFER_SIZE)
+
+
+def _validate_upload(filename: str) -> None:
+    """Validate an uploaded filename without reading its content.
+
+    Args:
+        filename: Client-provided name of the uploaded file
+
+    Raises:
+        ValueError: If the name contains path components or has an unsupported extension
+    """
+    # Plain string operations: no Path object per uploaded file
+    if not filename or os.path.basename(filename) != filename:
+        raise ValueError("invalid file name")
+    if os.path.splitext(filename)[1].lower() not in VALID_CONVERT_TYPES:
+        raise ValueError("invalid file type")
+
+
+def _stage_uploads(
+    job_id: str,
+    files: Dict[str, Tuple[FileStorage, int]],
+    options: JobOptions,
+) -> Dict[str, Path]:
+    """Validate, filter and stream uploaded files to UPLOADS_DIR.
+
+    Runs on the request thread, since werkzeug closes the upload streams
+    once the request has been handled.
+
+    Args:
+        job_id: Unique identifier for the job
+        files: Dictionary of uploaded files (filename -> (FileStorage, size in bytes))
+        options: Validated job options
+
+    Returns:
+        Dictionary of staged uploads (filename -> path in UPLOADS_DIR)
+
+    Raises:
+        ValueError: If fail_fast is set and an upload fails validation
+    """
+    max_file_size_kb = options.max_file_size_kb
+    pattern_mode = options.pattern_mode
+    pattern_input = options.pattern_input
+    pattern = compile_patterns(pattern_input)  # Compiled once for the whole batch
+    fail_fast = options.fail_fast
+
+    # Validate every filename before touching any file content
+    valid_files = {}
+    for filename, upload in files.items():
+        try:
+            _validate_upload(filename)
+        except ValueError as e:
+            logger.warning("Skipping %s: %s", filename, e)
+            _update_job(job_id, error="Error validating %s: %s" % (filename, str(e)))
+            if fail_fast:
+                raise ValueError("Invalid upload %s: %s" % (filename, str(e)))
+            continue
+        valid_files[filename] = upload
+
+    # Apply filtering
+    staged_files = {}
+    for idx, (filename, (file_data, size)) in enumerate(valid_files.items()):
+        # Size was measured once in handle_api, without buffering the content
+        size_kb = size / 1024
+
+        if not size:
+            logger.info("Skipping %s: file is empty", filename)
+            _update_job(job_id, error="Error converting %s: File is empty" % filename)
+            continue
+        if size_kb > max_file_size_kb:
+            logger.info("Skipping %s: exceeds size limit of %sKB", filename, max_file_size_kb)
+            continue
+            
+        # Check pattern match
+        matches = pattern is not None and pattern.search(filename) is not None
+        if pattern_mode == "exclude" and matches:
+            logger.info("Skipping %s: matches exclude pattern", filename)
+            continue
+        elif pattern_mode == "include" and not matches and pattern_input:
+            logger.info("Skipping %s: doesn't match include pattern", filename)
+            continue
+
+        # Prefix with the job ID so concurrent jobs never share an upload path
+        input_path = UPLOADS_PATH / f"{job_id}_{idx}_{secure_filename(filename)}"
+        try:
+            # A spool that rolled over is already a file in UPLOADS_DIR: rename it
+            # into place; in-memory uploads are streamed to disk in chunks
+            stream = file_data.stream
+            if not (isinstance(stream, _LimitedSpool) and stream.move_to(input_path)):
+                fd = os.open(str(input_path), _UPLOAD_OPEN_FLAGS, 0o644)
+                try:
+                    _save_upload(file_data, fd)
+                finally:
+                    os.close(fd)
+        except OSError as e:
+            logger.error("Error saving upload %s: %s", filename, e)
+            _update_job(job_id, error="Error saving %s: %s" % (filename, str(e)))
+            continue
+        staged_files[filename] = input_path
+
+    return staged_files
+
+
+def _run_convert_batch(
+    batch: List[Dict[str, object]], on_result: Callable[[int, Optional[str]], None]
+) -> None:
+    """Run convert_document over a batch of argument sets in one child interpreter.
+
+    A conversion that crashes the child or runs longer than CONVERT_TIMEOUT_SECONDS
+    fails on its own; the rest of the batch carries on in a fresh child.
+
+    Args:
+        batch: Keyword arguments for each convert_document namespace
+        on_result: Called in batch order with each index and its error message,
+            None on success
+    """
+    done = 0
+    while done < len(batch):
+        timed_out = threading.Event()
+        with _convert_slots:
+            proc = subprocess.Popen(
+                [sys.executable, "-m", "convert_worker"],
+                env=_CONVERT_ENV,
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.DEVNULL,  # Errors come back on the result stream
+                text=True,
+            )
+
+            def expire():
+                timed_out.set()
+                proc.kill()
+
+            try:
+                try:
+                    proc.stdin.write("".join(json.dumps(args) + "\n" for args in batch[done:]))
+                    proc.stdin.close()
+                except BrokenPipeError:
+                    pass  # The child died at start-up; reported below
+                while done < len(batch):
+                    # Each conversion gets the full timeout, measured from the previous result
+                    timer = threading.Timer(CONVERT_TIMEOUT_SECONDS, expire)
+                    timer.start()
+                    try:
+                        line = proc.stdout.readline()
+                    finally:
+                        timer.cancel()
+                    if not line:
+                        break
+                    on_result(done, json.loads(line))
+                    done += 1
+            finally:
+                proc.stdout.close()
+                returncode = proc.wait()
+        if done < len(batch):
+            if timed_out.is_set():
+                error = f"conversion timed out after {CONVERT_TIMEOUT_SECONDS}s"
+            else:
+                error = f"converter exited with status {returncode}"
+            on_result(done, error)
+            done += 1
+
+
+def _check_dir(path: Path, label: str) -> os.stat_result:
+    """Stat a directory once, checking that it exists and is a directory.
+
+    Args:
+        path: Directory to check
+        label: What to call the path in error messages
+
+    Returns:
+        os.stat_result: The directory's stat result, for reuse by the caller
+
+    Raises:
+        IOError: If the path doesn't exist or isn't a directory
+    """
+    try:
+        st = os.stat(path)
+    except FileNotFoundError:
+        raise IOError(f"{label} not found: {path}")
+    if not stat.S_ISDIR(st.st_mode):
+        raise IOError(f"Not a directory: {path}")
+    return st
+
+
+def _convert_batch(
+    batch: List[Tuple[int, Tuple[str, Path]]],
+    output_dir: Path,
+    options: JobOptions,
+    report: Callable[[int, Optional[Path], Optional[str]], None],
+) -> None:
+    """Convert a batch of staged uploads in one converter process.
+
+    Each conversion writes to a hidden temporary file that is renamed into
+    place once complete, so clients never see a partially written output.
+
+    Args:
+        batch: (index, (filename, staged path)) for each upload in the batch
+        output_dir: Directory the job's outputs are written to
+        options: Validated job options
+        report: Called once per upload with its index and either
+            (output path, None) on success or (None, error message) on failure
+    """
+    outputs = []
+    args = []
+    suffix = "." + options.format
+    for idx, (filename, input_path) in batch:
+        # Staged uploads are already absolute paths in UPLOADS_PATH and were checked
+        # for size when they were written, so the input needs no stat here. Output
+        # names keep the client's filename, which _validate_upload already limited
+        # to a bare name; only the staged input path goes through secure_filename
+        out_filename = filename + suffix
+        partial_path = output_dir / (".partial_" + out_filename)
+        outputs.append((idx, filename, partial_path, output_dir / out_filename))
+        # Arguments for convert_document, passed to the child as JSON
+        args.append(dict(
+            command="convert",
+            input=str(input_path),
+            output=str(partial_path),
+            format=options.format,
+            pages=options.pages,
+            brightness=options.brightness,
+            contrast=options.contrast,
+            resolution=options.resolution,
+        ))
+
+    reported = 0
+
+    def finish(position: int, error: Optional[str]) -> None:
+        nonlocal reported
+        idx, filename, partial_path, final_path = outputs[position]
+        try:
+            if error:
+                raise RuntimeError(error)
+            # Verify output after conversion
+            try:
+                output_size = partial_path.stat().st_size
+            except FileNotFoundError:
+                raise IOError(f"Output file not created: {partial_path}")
+            if output_size == 0:
+                raise IOError(f"Output file is empty: {partial_path}")
+            os.replace(partial_path, final_path)
+            result = (final_path, None)
+        except Exception as e:
+            logger.error("Error during conversion of %s: %s", filename, e)
+            try:
+                partial_path.unlink()  # Clean up failed output
+            except FileNotFoundError:
+                pass
+            except Exception as cleanup_err:
+                logger.error("Error cleaning up output file: %s", cleanup_err)
+            result = (None, "Error converting %s: %s" % (filename, str(e)))
+        reported += 1
+        report(idx, *result)
+
+    logger.debug("Starting conversion of %d files with args: %s", len(args), args)
+    try:
+        _run_convert_batch(args, finish)
+    except Exception as e:
+        # The converter could not be started; fail what the batch hadn't reported
+        for position in range(reported, len(outputs)):
+            finish(position, str(e))
 
 
 def process_job(
     job_id: str,
     command: str,
-    files: Optional[Dict[str, FileStorage]] = None,
-    options: Optional[ConversionOptions] = None,
+    files: Optional[Dict[str, Union[Path, str]]] = None,
+    options: Optional[JobOptions] = None,
 ) -> None:
     """Background processing for all job types
 
     Args:
         job_id: Unique identifier for the job
         command: Type of operation ('convert' or 'export')
-        files: Dictionary of uploaded files (filename -> FileStorage)
-        options: Dictionary of conversion/export options
+        files: Staged uploads (filename -> path in UPLOADS_DIR) for 'convert';
+            export source details (repo_url or local_dir) for 'export'
+        options: Validated conversion/export options
     """
     if options is None:
-        options = ConversionOptions()
+        options = JobOptions()
     
     # Initialize temp_files list at the start
     temp_files = []
     
-    # Get filtering options
-    max_file_size_kb = int(options.get("max_file_size_kb", 1000))  # Default 1MB
-    pattern_mode = options.get("pattern_mode", "exclude")
-    pattern_input = options.get("pattern_input", "")
-    
-    # Initialize job status
-    if job_id not in conversion_jobs:
-        conversion_jobs[job_id] = {
-            "status": "processing",
-            "progress": 0,
-            "errors": [],
-            "start_time": datetime.now(),
-            "output_files": []
-        }
-    job = conversion_jobs[job_id]
+    # handle_api registers every job before queueing it; one that /cleanup removed
+    # while it waited must not be brought back, and its staged uploads go with it
+    if conversion_jobs.get(job_id) is None:
+        _discard_staged(files or {})
+        return
+    _update_job(job_id, only_if=lambda j: j["status"] == "queued", status="processing")
     
     try:
-        # Job already initialized above
-        job["errors"] = []  # Reset errors at start
-
         # Handle different commands
         if command == "convert":
             if not files:
-                raise ValueError("No files provided for conversion")
-
-            # Validate format for conversion
-            valid_formats = ["text", "pdf", "html", "docx", "xlsx", "pptx"]
-            output_format = str(options.get("format", "text"))
-            if output_format not in valid_formats:
-                formats_str = ", ".join(valid_formats)
-                raise ValueError(
-                    ("Invalid format: %s. Valid formats are: %s" % (output_format, formats_str))
-                )
-
-            # Validate numeric parameters
-            try:
-                brightness = float(str(options.get("brightness", 1.0)))
-                contrast = float(str(options.get("contrast", 1.0)))
-                resolution = int(str(options.get("resolution", 300)))
-
-                if not (0.1 <= brightness <= 2.0):
-                    raise ValueError("Brightness must be between 0.1 and 2.0")
-                if not (0.1 <= contrast <= 2.0):
-                    raise ValueError("Contrast must be between 0.1 and 2.0")
-                if not (72 <= resolution <= 1200):
-                    msg = "Resolution must be between 72 and 1200 DPI"
-                    raise ValueError(msg)
-            except ValueError as e:
-                raise ValueError("Invalid conversion parameters: %s" % str(e))
-
-            # Process files
-            output_files = []
-            filtered_files = {}
-            
-            # Valid file extensions and their MIME types
-            valid_types = {
-                '.txt': 'text/plain',
-                '.pdf': 'application/pdf',
-                '.docx': 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-                '.xlsx': 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-                '.pptx': 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-                '.html': 'text/html',
-                '.htm': 'text/html'
-            }
-            
-            # Apply filtering
-            for filename, file_data in files.items():
-                # Make a copy of the file data to avoid handle issues
-                file_content = file_data.read()
-                file_data.seek(0)  # Reset position for potential reuse
-                
-                # Validate file type
-                file_ext = os.path.splitext(filename)[1].lower()
-                if file_ext not in valid_types:
-                    logger.warning(f"Skipping {filename}: invalid file type")
-                    continue
-                
-                # Check file size
-                size_kb = len(file_content) / 1024
-                
-                if size_kb > max_file_size_kb:
-                    logger.info(f"Skipping {filename}: exceeds size limit of {max_file_size_kb}KB")
-                    continue
-                    
-                # Check pattern match
-                matches = matches_pattern(filename, pattern_input)
-                if pattern_mode == "exclude" and matches:
-                    logger.info(f"Skipping {filename}: matches exclude pattern")
-                    continue
-                elif pattern_mode == "include" and not matches and pattern_input:
-                    logger.info(f"Skipping {filename}: doesn't match include pattern")
-                    continue
-                    
-                filtered_files[filename] = file_data
-            
-            total_files = len(filtered_files)
-            if total_files == 0:
                 raise ValueError("No files match the filtering criteria")
+            temp_files.extend(files.values())  # Track staged uploads for cleanup
+
+            # Process files concurrently; results are kept in upload order
+            total_files = len(files)
+            progress_step = 100.0 / total_files
+            results = [None] * total_files
+            output_dir = EXPORTS_PATH / job_id  # Outputs of concurrent jobs never collide
+            output_dir.mkdir(parents=True, exist_ok=True)
             
-            for idx, (filename, file_data) in enumerate(filtered_files.items()):
-                input_path = None
-                output_path = None
-                try:
-                    # Save uploaded file
-                    input_path = Path(UPLOADS_DIR) / filename  # Use constant from file2ai module
-                    # Get file content from filtered_files
-                    if isinstance(file_data, (str, bytes)):
-                        file_content = file_data
-                    else:
-                        file_content = file_data.read()
-                        file_data.seek(0)  # Reset position
-                    
-                    # Create and write to file
-                    with open(str(input_path), 'wb') as f:
-                        if isinstance(file_content, str):
-                            f.write(file_content.encode('utf-8'))
-                        else:
-                            f.write(file_content)
-                    temp_files.append(input_path)  # Track for cleanup
-                    
-                    # Convert path to absolute path
-                    input_path = input_path.resolve()
-                    logger.info(f"Using absolute path for conversion: {input_path}")
-                    
-                    # Verify file exists and has content
-                    if not input_path.exists():
-                        raise IOError(f"File not created: {input_path}")
-                    if input_path.stat().st_size == 0:
-                        raise IOError(f"File is empty: {input_path}")
-                    
-                    logger.info(f"Successfully saved uploaded file to: {input_path}")
-
-                    # Create output path
-                    out_filename = f"{filename}.{output_format}"
-                    output_path = Path(EXPORTS_DIR) / out_filename
-                    logger.info(f"Converting {input_path} to {output_path} with format {output_format}")
-
-                    # Create args namespace
-                    args = Namespace(
-                            command="convert",
-                            input=str(input_path),
-                            output=str(output_path),
-                            format=output_format,
-                            pages=options.get("pages"),
-                            brightness=brightness,
-                            contrast=contrast,
-                            resolution=resolution,
+            # Files are dealt round-robin into batches, one converter process each; at
+            # least one batch per worker keeps every converter slot the job can use busy
+            workers = min(CONVERT_WORKERS, total_files)
+            batch_count = max(workers, -(-total_files // CONVERT_BATCH_SIZE))
+            items = list(enumerate(files.items()))
+            converted = queue.SimpleQueue()
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="convert") as pool:
+                for start in range(batch_count):
+                    pool.submit(
+                        _convert_batch,
+                        items[start::batch_count],
+                        output_dir,
+                        options,
+                        lambda *result: converted.put(result),
                     )
+                filenames = list(files)
+                for done in range(1, total_files + 1):
+                    idx, output_path, error = converted.get()
+                    results[idx] = output_path
+                    _update_job(job_id, progress=done * progress_step, error=error)
+                    logger.info("Converted %d/%d: %s", done, total_files, filenames[idx])
 
-                    # Convert file
-                    logger.info(f"Starting conversion with args: {args}")
-                    
-                    # Verify input file still exists before conversion
-                    if not input_path.exists():
-                        raise IOError(f"Input file missing before conversion: {input_path}")
-                    
-                    
-                    # Check file permissions and readability
-                    if not os.access(str(input_path), os.R_OK):
-                        raise IOError(f"Input file not readable: {input_path}")
-                        
-                    logger.info(f"Input file verified before conversion: {input_path}")
-                    convert_document(args)
-                    
-                    # Verify output after conversion
-                    if not output_path.exists():
-                        raise IOError(f"Output file not created: {output_path}")
-                    if output_path.stat().st_size == 0:
-                        raise IOError(f"Output file is empty: {output_path}")
-                    logger.info(f"Successfully converted file: {output_path}")
-                    output_files.append(output_path)
-                    
-                    # Update progress
-                    progress = ((idx + 1) / total_files) * 100
-                    job["progress"] = progress
-                    logger.info(f"Updated progress to {progress}%")
-                except Exception as e:
-                    logger.error(f"Error during conversion: {str(e)}")
-                    job["errors"].append("Error converting %s: %s" % (filename, str(e)))
-                    if output_path and output_path.exists():
-                        try:
-                            output_path.unlink()  # Clean up failed output
-                        except Exception as cleanup_err:
-                            logger.error(f"Error cleaning up output file: {cleanup_err}")
-                finally:
-                    if input_path and input_path.exists():
-                        input_path.unlink()
+            output_files = [path for path in results if path is not None]
+            if not output_files:
+                output_dir.rmdir()
 
-            job["output_files"] = output_files
-            
-            if job["errors"]:
-                job["status"] = "completed_with_errors"
-            else:
-                job["status"] = "completed"
+            _update_job(job_id, output_files=output_files)
 
         elif command == "export":
             # Handle repository export or local directory export
-            repo_url = options.get("repo_url")
-            local_dir = options.get("local_dir")
-            subdir = options.get("subdir")  # Get subdir from options
+            repo_url = options.repo_url
+            local_dir = options.local_dir
 
             if not repo_url and not local_dir:
                 msg = "Neither repository URL nor local directory " "provided for export"
@@ -328,63 +1130,71 @@ def process_job(
                 if repo_url:
                     # Create output path for repository
                     repo_name = str(repo_url).rstrip("/").split("/")[-1].replace(".git", "")
-                    format_ext = str(options.get("format", "text"))
+                    format_ext = options.format
                     filename = f"{repo_name}_export.{format_ext}"
-                    output_path = Path(EXPORTS_DIR) / filename
+                    output_path = EXPORTS_PATH / job_id / filename  # Per job, like conversions
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
 
                     # Create args namespace for repository export
                     args = Namespace(
                         command="export",
                         repo_url=str(repo_url),
-                        branch=str(options.get("branch") or "main"),  # Default to main if no branch specified
-                        token=str(options.get("token", "")),
+                        branch=options.branch or "main",  # Default to main if no branch specified
+                        token=options.token or "",
                         output=str(output_path),
-                        format=str(options.get("format", "text")),
+                        format=options.format,
                         repo_url_sub=None,  # Add missing required attribute
-                        output_file=None,  # Add missing required attribute
+                        output_file=str(Path(job_id, filename)),  # Relative to the exports directory
                         skip_remove=False,  # Add missing required attribute
-                        subdir=options.get("subdir", "")  # Get subdir from options, default to empty string
+                        subdir=options.subdir or ""  # Default to empty string
                     )
 
                     # Export repository
                     try:
-                        # Ensure output directory exists
-                        output_path.parent.mkdir(parents=True, exist_ok=True)
-                        
                         # Export repository
                         clone_and_export(args)
                         
                         # Verify output
                         if output_path.exists():
-                            job["output_files"] = [output_path]
-                            job["status"] = "completed"
-                            job["progress"] = 100
+                            _update_job(
+                                job_id,
+                                output_files=[output_path],
+                                status="completed",
+                                progress=100
+                            )
                             logger.info(f"Successfully created output file: {output_path}")
                         else:
-                            job["status"] = "failed"
-                            job["errors"].append(f"Export failed to create output file: {output_path}")
+                            _update_job(
+                                job_id,
+                                status="failed",
+                                error=f"Export failed to create output file: {output_path}"
+                            )
                             logger.error(f"Failed to create output file: {output_path}")
                     except Exception as e:
-                        job["status"] = "failed"
-                        job["errors"].append(f"Export failed: {str(e)}")
-                        job["progress"] = 0
+                        _update_job(
+                            job_id,
+                            status="failed",
+                            progress=0,
+                            error=f"Export failed: {str(e)}"
+                        )
                         logger.error(f"Export error: {str(e)}")
                 else:
                     # Create output path for local directory
                     dir_name = Path(str(local_dir)).name
-                    format_ext = str(options.get("format", "text"))
+                    format_ext = options.format
                     filename = f"{dir_name}_export.{format_ext}"
-                    output_path = Path(EXPORTS_DIR) / filename
+                    output_path = EXPORTS_PATH / job_id / filename  # Per job, like conversions
+                    output_path.parent.mkdir(parents=True, exist_ok=True)
 
                     # Create args namespace for local export
                     args = Namespace(
                         command="export",
                         local_dir=str(local_dir),
                         output=str(output_path),
-                        format=str(options.get("format", "text")),
-                        output_file=None,  # Required attribute
+                        format=options.format,
+                        output_file=str(Path(job_id, filename)),  # Relative to the exports directory
                         skip_remove=False,  # Required attribute
-                        subdir=options.get("subdir", ""),  # Handle subdir parameter
+                        subdir=options.subdir or "",  # Handle subdir parameter
                         repo_url=None,  # Required for consistency
                         branch=None,  # Required for consistency
                         token=None   # Required for consistency
@@ -392,86 +1202,113 @@ def process_job(
 
                     # Export local directory
                     try:
-                        # Get list of files to process
-                        directory_files = []
-                        if isinstance(files, dict):
-                            directory_files = files.get("directory_files", [])
-                        if not directory_files:
-                            raise IOError(f"No files found in directory: {local_dir}")
-                            
                         # Verify input directory exists and is readable
                         input_dir = Path(str(local_dir))
-                        if not input_dir.exists():
-                            raise IOError(f"Directory not found: {input_dir}")
-                        if not input_dir.is_dir():
-                            raise IOError(f"Not a directory: {input_dir}")
+                        input_stat = _check_dir(input_dir, "Directory")
                         if not os.access(str(input_dir), os.R_OK):
                             raise IOError(f"Directory not readable: {input_dir}")
-                            
-                        logger.debug(f"Processing {len(directory_files)} files from directory: {input_dir}")
-                            
-                        # Handle subdir if specified
+
+                        # Only the subdirectory is exported when one is given, so only it is
+                        # scanned; local_export applies args.subdir itself
+                        scan_dir, scan_stat = input_dir, input_stat
                         if args.subdir:
-                            subdir_path = input_dir / args.subdir
-                            if not subdir_path.exists():
-                                raise IOError(f"Subdirectory not found: {subdir_path}")
-                            if not subdir_path.is_dir():
-                                raise IOError(f"Not a directory: {subdir_path}")
-                            args.local_dir = str(subdir_path)
-                            logger.debug(f"Using subdirectory: {subdir_path}")
-
-                        # Ensure output directory exists
-                        output_path.parent.mkdir(parents=True, exist_ok=True)
-                        
+                            scan_dir = input_dir / args.subdir
+                            scan_stat = _check_dir(scan_dir, "Subdirectory")
+                            logger.debug(f"Using subdirectory: {scan_dir}")
+
+                        # Scan here rather than in the request handler, which only enqueues.
+                        # The scan applies the job's filters and FILE2AI_MAX_FILES, which
+                        # local_export's own walk does not, so it can't be folded into it.
+                        # It prunes the same directories as the export, so dependency trees
+                        # the export never reads don't count against the limit
+                        overrides = load_gitignore_patterns(scan_dir)[1]
+                        file_count = len(gather_filtered_files(
+                            str(scan_dir),
+                            max_size_kb=options.max_file_size_kb,
+                            pattern_mode=options.pattern_mode,
+                            pattern_input=options.pattern_input,
+                            root_stat=scan_stat,
+                            max_files=MAX_EXPORT_FILES,
+                            skip_dirs=frozenset() if overrides else PRUNED_DIRS,
+                            walk_threads=EXPORT_WALK_THREADS
+                        ))
+                        if not file_count:
+                            raise IOError(f"No matching files found in directory: {scan_dir}")
+                            
+                        logger.debug("Processing %d files from directory: %s", file_count, scan_dir)
+
                         # Export directory
                         logger.debug(f"Starting local export from {args.local_dir} to {output_path}")
                         local_export(args)
                         
-                        # Verify output
-                        if output_path.exists():
-                            if output_path.stat().st_size == 0:
+                        # Verify output with a single stat
+                        try:
+                            output_size = os.stat(output_path).st_size
+                        except FileNotFoundError:
+                            output_size = None
+                        if output_size is not None:
+                            if output_size == 0:
                                 raise IOError(f"Output file is empty: {output_path}")
-                            job["output_files"] = [output_path]
-                            job["status"] = "completed"
-                            job["progress"] = 100
+                            _update_job(
+                                job_id,
+                                output_files=[output_path],
+                                status="completed",
+                                progress=100
+                            )
                             logger.info(f"Successfully created output file: {output_path}")
                         else:
-                            job["status"] = "failed"
-                            job["errors"].append(f"Export failed to create output file: {output_path}")
+                            _update_job(
+                                job_id,
+                                status="failed",
+                                error=f"Export failed to create output file: {output_path}"
+                            )
                             logger.error(f"Failed to create output file: {output_path}")
                     except Exception as e:
-                        job["status"] = "failed"
-                        job["errors"].append(f"Export failed: {str(e)}")
-                        job["progress"] = 0
+                        _update_job(
+                            job_id,
+                            status="failed",
+                            progress=0,
+                            error=f"Export failed: {str(e)}"
+                        )
                         logger.error(f"Export error: {str(e)}")
                         # Clean up any partial output
                         if output_path.exists():
                             try:
                                 output_path.unlink()
                             except Exception as cleanup_err: 
-                                logger.error(f"Error cleaning up output file: {cleanup_err}")
+                                logger.error("Error cleaning up output file: %s", cleanup_err)
 
             except Exception as e:
                 error_type = "repository" if repo_url else "local directory"
                 error_msg = "Error exporting %s: %s" % (error_type, str(e))
-                job["errors"].append(error_msg)
+                _update_job(job_id, error=error_msg)
 
         else:
             raise ValueError("Invalid command: %s" % command)
 
-        # Update final status
-        if not job["errors"]:
-            job["status"] = "completed"
-            job["progress"] = 100
+        # Read back what the work recorded; /cleanup may have removed the job meanwhile
+        job = _get_job(job_id)
+        if job is None:
+            return
+
+        # Update final status; a job with errors and nothing to download has failed
+        if job["status"] == "failed" or (job["errors"] and not job["output_files"]):
+            final = dict(status="failed")
+        elif not job["errors"]:
+            final = dict(status="completed", progress=100)
         else:
-            job["status"] = "completed_with_errors"
-            
-        logger.info(f"Job {job_id} completed with status: {job['status']}")
+            final = dict(status="completed_with_errors")
+        # Pick the preview once instead of filtering outputs on every /preview
+        _update_job(
+            job_id,
+            preview_file=next((f for f in job["output_files"] if f.suffix == ".text"), None),
+            **final,
+        )
+        logger.info("Job %s completed with status: %s", job_id, final["status"])
 
     except Exception as e:
         error_msg = f"Job failed: {str(e)}"
-        job["status"] = "failed"
-        job["errors"].append(error_msg)
+        _update_job(job_id, status="failed", error=error_msg)
         logger.error(error_msg)
 
     finally:
@@ -484,55 +1321,173 @@ def process_job(
                 logger.error(f"Error cleaning up temp file {temp_file}: {e}")
         
         # Ensure job has a final status
-        if job["status"] == "processing":
-            job["status"] = "failed"
-            job["errors"].append("Job terminated unexpectedly")
-            
-        # Signal completion
-        if job_id in job_events:
-            job_events[job_id].set()
-            logger.info(f"Job {job_id} event signaled")
+        _update_job(
+            job_id,
+            error="Job terminated unexpectedly",
+            only_if=lambda live: live["status"] == "processing",
+            status="failed",
+        )
+
+
+@app.errorhandler(RequestEntityTooLarge)
+def upload_too_large(e):
+    """Reject request bodies over MAX_CONTENT_LENGTH, or files over MAX_FILE_SIZE, with a JSON error."""
+    if isinstance(e, _FileTooLarge):
+        return (jsonify({"error": e.description}), 413)
+    return (jsonify({"error": f"Upload exceeds the {MAX_UPLOAD_KB}KB limit"}), 413)
+
+
+@app.errorhandler(_SpoolFailed)
+def upload_spool_failed(e):
+    """Report an upload that couldn't be written to UPLOADS_DIR as a retryable JSON error."""
+    logger.error("Upload spooling failed: %s", e.description)
+    response = jsonify({"error": e.description})
+    response.headers["Retry-After"] = "30"
+    return response, 503
 
 
 @app.route("/", defaults={"path": ""})
 @app.route("/<path:path>")
 def serve_react(path):
-    app.logger.info(f"Serving path: {path}")
-    
-    if not path:
-        app.logger.info("Serving index.html")
-        try:
-            return send_from_directory("frontend", "index.html")
-        except Exception as e:
-            app.logger.error(f"Error serving index.html: {str(e)}")
-            return str(e), 500
+    app.logger.debug("Serving path: %s", path)
     
     if path.startswith("api/"):
         return "Not found", 404
-        
-    frontend_path = Path("frontend") / path
-    app.logger.info(f"Checking path: {frontend_path}")
     
-    if frontend_path.exists():
+    if path:
         try:
-            mimetype = None
-            if path.endswith('.js'):
-                mimetype = 'application/javascript'
-                response = send_from_directory("frontend", path, mimetype=mimetype)
-                app.logger.info(f"Serving JS file with mimetype: {mimetype}")
-                return response
-            elif path.endswith('.html'):
-                mimetype = 'text/html'
-                return send_from_directory("frontend", path, mimetype=mimetype)
-            
-            app.logger.info(f"Serving static file: {path}")
-            return send_from_directory("frontend", path)
-        except Exception as e:
-            app.logger.error(f"Error serving {path}: {str(e)}")
-            return str(e), 500
+            return send_from_directory(FRONTEND_DIR, path, max_age=STATIC_MAX_AGE)
+        except NotFound:
+            app.logger.debug("File not found, serving index.html")
     
-    app.logger.info("File not found, serving index.html")
-    return send_from_directory("frontend", "index.html")
+    return _index_response()
+
+
+def _asset_response(filename: str) -> Optional[Response]:
+    """Serve a preloaded frontend file, answering revalidations with 304.
+
+    Returns None when the file isn't preloaded, or in debug mode, where
+    edits to the frontend should show up without a restart.
+    """
+    asset = FRONTEND_ASSETS.get(filename)
+    if asset is None or app.debug:
+        return None
+    content, mimetype, etag = asset
+    response = Response(content, mimetype=mimetype)
+    response.set_etag(etag)
+    response.cache_control.public = True
+    response.cache_control.max_age = STATIC_MAX_AGE
+    return response.make_conditional(request)
+
+
+def _index_response():
+    """Serve index.html, from memory when it was preloaded."""
+    response = _asset_response("index.html")
+    if response is None:
+        return send_from_directory(FRONTEND_DIR, "index.html", max_age=STATIC_MAX_AGE)
+    return response
+
+
+_send_static_file = app.view_functions["static"]
+
+
+def _serve_static(filename):
+    """Serve frontend assets from memory, falling back to Flask's static view."""
+    response = _asset_response(filename)
+    if response is None:
+        return _send_static_file(filename=filename)
+    return response
+
+
+app.view_functions["static"] = _serve_static
+
+
+def _pool_for(command: str) -> ThreadPoolExecutor:
+    """Return the pool that runs jobs for a command."""
+    return JOB_POOL if command == "convert" else EXPORT_POOL
+
+
+def _pool_full(pool: ThreadPoolExecutor) -> bool:
+    """Whether a pool already has MAX_PENDING_JOBS jobs queued or running."""
+    with _pending_lock:
+        return 0 < MAX_PENDING_JOBS <= _pending_jobs[pool]
+
+
+def _release_job_slot(pool: ThreadPoolExecutor) -> None:
+    """Free the pending-job slot a finished or rejected job held on a pool."""
+    with _pending_lock:
+        _pending_jobs[pool] -= 1
+
+
+def _busy_response():
+    """Build the 503 response telling clients to retry later."""
+    response = jsonify({"error": "Server is busy, please retry shortly"})
+    response.headers["Retry-After"] = "5"
+    return response, 503
+
+
+def _register_job() -> str:
+    """Record a new queued job and return its ID.
+
+    Called only once a request has passed validation, so rejected
+    submissions never leave a job behind.
+    """
+    _enforce_job_limit()
+    # 96 random bits, URL- and filename-safe, in 16 characters instead of 36
+    job_id = secrets.token_urlsafe(12)
+    _set_job(job_id, JobStatus(
+        status="queued",
+        progress=0,
+        errors=[],
+        start_time=time.monotonic(),
+        output_files=[],
+        preview_file=None,
+        future=None
+    ))
+    return job_id
+
+
+def _discard_staged(files: Dict) -> None:
+    """Delete the staged uploads of a job that will never be converted."""
+    for path in files.values():
+        if isinstance(path, Path):
+            path.unlink(missing_ok=True)
+
+
+def _submit_job(job_id: str, command: str, files: Dict, options: JobOptions):
+    """Queue a job on the pool for its command and return the API response."""
+    pool = _pool_for(command)
+    with _pending_lock:
+        accepted = not MAX_PENDING_JOBS or _pending_jobs[pool] < MAX_PENDING_JOBS
+        if accepted:
+            _pending_jobs[pool] += 1
+    try:
+        if not accepted:
+            raise RuntimeError("too many pending jobs")
+        future = pool.submit(process_job, job_id, command, files, options)
+    except RuntimeError as e:
+        # Full, or the pool refuses new work because it is shutting down
+        logger.error(f"Could not queue job {job_id}: {e}")
+        if accepted:
+            _release_job_slot(pool)
+        _pop_job(job_id)
+        _discard_staged(files)
+        return _busy_response()
+
+    def _job_done(future):
+        _release_job_slot(pool)
+        if future.cancelled():
+            # process_job never ran, so nothing else will remove its staged uploads
+            _discard_staged(files)
+
+    future.add_done_callback(_job_done)
+    _update_job(job_id, future=future)
+    # 202: the job is queued, and Location points at the status endpoint to poll
+    return jsonify({"job_id": job_id}), 202, {
+        "Location": url_for("get_status", job_id=job_id),
+        "Retry-After": "1",
+    }
+
 
 @app.route("/", methods=["POST"])
 def handle_api():
@@ -553,74 +1508,44 @@ def handle_api():
     - branch: str, optional repository branch (for export command)
     - token: str, optional GitHub token (for export command)
     - local_dir: str, optional local directory path (for export command)
+    - fail_fast: bool, optional; fail the whole job on the first invalid upload
+
+    Responds 202 Accepted with the job_id and a Location header for /status/<job_id>.
     """
+    # Turn uploads away before their body is read when conversions are already backed
+    # up. Only conversions take files, so a multipart body is treated as one here; the
+    # pool for the parsed command is checked again below
+    if request.mimetype == "multipart/form-data" and _pool_full(JOB_POOL):
+        return _busy_response()
+
+    # Resolve the request proxy and parsed form once; every field read below is then
+    # a plain lookup. A to_dict() copy would cost more than the handful of reads it saves
+    form = request.form
+
     # Debug logging
     logger.info("Received API request")
-    logger.debug(f"Form data: {request.form}")
-    logger.debug(f"Files: {request.files}")
-    logger.debug(f"Headers: {request.headers}")
-    
-    # Initialize options with file filtering parameters
-    try:
-        max_file_size = int(request.form.get("max_file_size_kb", "50"))
-        if max_file_size <= 0:
-            raise ValueError("max_file_size_kb must be positive")
-    except ValueError as e:
-        return jsonify({"error": f"Invalid max_file_size_kb: {str(e)}"}), 400
-        
-    pattern_mode = request.form.get("pattern_mode", "exclude")
-    if pattern_mode not in ["exclude", "include"]:
-        return jsonify({"error": "pattern_mode must be 'exclude' or 'include'"}), 400
+    logger.debug("Form data: %s", form)
+    logger.debug("Files: %s", request.files)
+    logger.debug("Headers: %s", request.headers)
     
-    command = request.form.get("command", "export")
-    logger.info(f"Processing command: {command}")
+    command = form.get("command", "export")
+    logger.info("Processing command: %s", command)
 
-    # Create job
-    job_id = str(uuid.uuid4())
-    conversion_jobs[job_id] = JobStatus(
-        status="queued",
-        progress=0,
-        errors=[],
-        start_time=datetime.now(),
-        output_files=[]
-    )
-    job_events[job_id] = threading.Event()
-
-    # Initialize options with file filtering parameters
+    # Parse and validate all options once
     try:
-        max_file_size = int(request.form.get("max_file_size_kb", "50"))
-        if max_file_size <= 0:
-            raise ValueError("max_file_size_kb must be positive")
+        options = JobOptions.from_form(form, command)
     except ValueError as e:
-        return jsonify({"error": f"Invalid max_file_size_kb: {str(e)}"}), 400
-        
-    pattern_mode = request.form.get("pattern_mode", "exclude")
-    if pattern_mode not in ["exclude", "include"]:
-        return jsonify({"error": "pattern_mode must be 'exclude' or 'include'"}), 400
-        
-    base_options = {
-        "max_file_size_kb": max_file_size,
-        "pattern_mode": pattern_mode,
-        "pattern_input": request.form.get("pattern_input", "")
-    }
+        return jsonify({"error": str(e)}), 400
+
+    # Exports, and anything not sent as multipart, are checked once the command is known
+    if _pool_full(_pool_for(command)):
+        return _busy_response()
 
-    # Handle different commands
+    # Handle different commands; the job is only registered once the request is valid
     if command == "convert":
         if not request.files:
             return jsonify({"error": "No files selected"}), 400
 
-        # Define security limits
-        MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB limit
-        ALLOWED_EXTENSIONS = {'.txt', '.pdf', '.doc', '.docx', '.xls', '.xlsx', '.ppt', '.pptx', '.html', '.htm'}
-        SUSPICIOUS_EXTENSIONS = {'.exe', '.bat', '.cmd', '.sh', '.js', '.php', '.py'}
-        ALLOWED_MIMETYPES = {
-            'text/plain', 'application/pdf',
-            'application/msword', 'application/vnd.openxmlformats-officedocument.wordprocessingml.document',
-            'application/vnd.ms-excel', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
-            'application/vnd.ms-powerpoint', 'application/vnd.openxmlformats-officedocument.presentationml.presentation',
-            'text/html'
-        }
-        
         # Validate and filter files
         files = {}
         for f in request.files.getlist("file"):
@@ -628,100 +1553,63 @@ def handle_api():
                 continue
                 
             # Check file size
-            f.seek(0, 2)  # Seek to end
-            size = f.tell()
-            f.seek(0)  # Reset to beginning
+            size = _upload_size(f)
             if size > MAX_FILE_SIZE:
                 logger.warning(f"Rejected oversized file: {f.filename} ({size} bytes)")
                 return jsonify({"error": f"File {f.filename} exceeds maximum size of 50MB"}), 400
                 
             # Check file extension and MIME type
-            ext = Path(f.filename).suffix.lower()
-            mime_type = f.content_type
+            ext = os.path.splitext(f.filename)[1].lower()
+            mime_type = f.mimetype  # content_type without charset/boundary parameters
             
-            if ext in SUSPICIOUS_EXTENSIONS:
-                logger.warning(f"Rejected suspicious file type: {f.filename}")
-                return jsonify({"error": f"File type not allowed: {ext}"}), 400
-                
-            if ext not in ALLOWED_EXTENSIONS:
+            # One lookup both checks the extension and gives its accepted MIME types;
+            # suspicious extensions are never in the table, so only misses need the check
+            allowed = _EXT_TO_MIMES.get(ext)
+            if allowed is None:
+                if ext in SUSPICIOUS_EXTENSIONS:
+                    logger.warning(f"Rejected suspicious file type: {f.filename}")
+                    return jsonify({"error": f"File type not allowed: {ext}"}), 400
                 logger.warning(f"Rejected unsupported file type: {f.filename}")
                 return jsonify({"error": f"Unsupported file type: {ext}"}), 400
                 
-            if mime_type not in ALLOWED_MIMETYPES:
-                logger.warning(f"Rejected file with invalid MIME type: {f.filename} ({mime_type})")
+            # Clients often omit the content type (e.g. curl), so only reject a mismatch
+            if mime_type and mime_type not in allowed:
+                logger.warning(f"Rejected file with mismatched MIME type: {f.filename} ({mime_type})")
                 return jsonify({"error": f"Invalid file type detected"}), 400
                 
-            files[f.filename] = f
+            files[f.filename] = (f, size)
         if not files:
             return jsonify({"error": "No valid files selected"}), 400
 
-        # Combine base options with conversion options
-        options = ConversionOptions(
-            format=request.form.get("format", "text"),
-            pages=request.form.get("pages", ""),
-            brightness=request.form.get("brightness", "1.0"),
-            contrast=request.form.get("contrast", "1.0"),
-            resolution=request.form.get("resolution", "300"),
-            max_file_size_kb=max_file_size,
-            pattern_mode=pattern_mode,
-            pattern_input=request.form.get("pattern_input", "")
-        )
+        # Stream uploads to disk while the request streams are still open
+        job_id = _register_job()
+        try:
+            staged_files = _stage_uploads(job_id, files, options)
+        except ValueError as e:
+            _pop_job(job_id)
+            return jsonify({"error": str(e)}), 400
 
         # Start conversion in background
-        thread = threading.Thread(target=process_job, args=(job_id, command, files, options))
-        thread.start()
-        return jsonify({"job_id": job_id})
+        return _submit_job(job_id, command, staged_files, options)
 
     else:  # command == 'export'
-        fmt = request.form.get("format", "text")
-        # Initialize options with filtering parameters
-        options = ConversionOptions(
-            format=fmt,
-            max_file_size_kb=max_file_size,
-            pattern_mode=pattern_mode,
-            pattern_input=request.form.get("pattern_input", ""),
-            subdir=request.form.get("subdir")  # Store subdir in options
-        )
-
-        # Add repository-specific options
-        if repo_url := request.form.get("repo_url"):
-            if not repo_url:
-                return jsonify({"error": "No repository URL provided"}), 400
-            options.update(
-                repo_url=repo_url,
-                branch=request.form.get("branch"),
-                token=request.form.get("token"),
-            )
+        # Repository export; repo_url, branch and token are already in options
+        if repo_url := options.repo_url:
             files = {"repo_url": repo_url}
 
         # Add local directory options
-        elif local_dir := request.form.get("local_dir"):
-            if not local_dir:
-                return jsonify({"error": "No directory selected"}), 400
-            
-            dir_path = str(Path(local_dir).absolute())
-            if not Path(dir_path).exists():
+        elif local_dir := form.get("local_dir"):
+            # One string operation; no Path round trip. abspath also folds '..' components
+            dir_path = os.path.abspath(local_dir)
+            dir_stat = _cached_stat(dir_path)
+            if dir_stat is None:
                 return jsonify({"error": f"Directory not found: {dir_path}"}), 400
-                
-            # Gather filtered files from directory
-            try:
-                directory_files = gather_filtered_files(
-                    dir_path,
-                    max_size_kb=max_file_size,
-                    pattern_mode=pattern_mode,
-                    pattern_input=request.form.get("pattern_input", "")
-                )
-            except Exception as e:
-                return jsonify({"error": f"Error scanning directory: {str(e)}"}), 400
-                
-            if not directory_files:
-                return jsonify({"error": f"No matching files found in directory: {dir_path}"}), 400
-                
-            options["local_dir"] = dir_path
-            files = {
-                "local_dir": dir_path,
-                "directory_files": directory_files
-            }
+            if not stat.S_ISDIR(dir_stat.st_mode):
+                return jsonify({"error": f"Not a directory: {dir_path}"}), 400
+
+            # The directory is scanned by the export job, so large trees don't hold up the request
+            options = replace(options, local_dir=dir_path)
+            files = {"local_dir": dir_path}
 
         else:
             return jsonify({
@@ -729,51 +1617,64 @@ def handle_api():
             }), 400
 
         # Start export in background
-        thread = threading.Thread(target=process_job, args=(job_id, command, files, options))
+        return _submit_job(_register_job(), command, files, options)
+
 
-    thread.start()
-    return jsonify({"job_id": job_id})
+# Number of characters returned by /preview
+PREVIEW_CHARS = 1000
 
 
 @app.route("/preview/<job_id>")
 def get_preview(job_id):
     """Get a preview of the converted text content."""
-    if job_id not in conversion_jobs:
+    job = _get_job(job_id)
+    if job is None:
         return jsonify({"error": "Job not found"}), 404
         
-    job = conversion_jobs[job_id]
     if not job["output_files"]:
         return jsonify({"error": "No output files available"}), 404
         
-    # Get the first text file
-    text_files = [f for f in job["output_files"] if str(f).endswith(".text")]
-    if not text_files:
+    # The first text output, picked once when the job finished
+    preview_file = job["preview_file"]
+    if preview_file is None:
         return jsonify({"error": "No text preview available"}), 404
         
     try:
-        # Read first 1000 characters
-        with open(text_files[0], 'r', encoding='utf-8') as f:
-            content = f.read(1000)
+        # One unbuffered read covers 1000 characters of UTF-8 (at most 4 bytes each)
+        with open(preview_file, 'rb', buffering=0) as f:
+            raw = f.read(PREVIEW_CHARS * 4)
+        content = raw.decode('utf-8', errors='replace')[:PREVIEW_CHARS]
         return jsonify({
             "preview": content,
-            "file": str(text_files[0].name)
+            "file": preview_file.name
         })
     except Exception as e:
         return jsonify({"error": f"Error reading preview: {str(e)}"}), 500
 
-@app.route("/status/<job_id>")
-def get_status(job_id):
-    """Get job status"""
-    if job_id not in conversion_jobs:
-        return (jsonify({"error": "Job not found"}), 404)
 
-    job = conversion_jobs[job_id]
-    
-    # Check if job is completed but has errors
-    if job["status"] == "processing" and job["errors"]:
-        job["status"] = "failed"
-    
-    response = {
+def _reconcile_status(job_id: str, job: JobStatus) -> None:
+    """Apply status corrections to a job snapshot before reporting it."""
+    # A worker that died without recording a final status must not look busy forever
+    future = job["future"]
+    if future is not None and future.done() and job["status"] not in TERMINAL_STATUSES:
+        exc = None if future.cancelled() else future.exception()
+        error = f"Job failed: {exc!r}" if exc else "Job was cancelled"
+        if _update_job(
+            job_id,
+            error=error,
+            only_if=lambda live: live["status"] not in TERMINAL_STATUSES,
+            status="failed",
+        ):
+            job["status"] = "failed"
+            job["errors"].append(error)
+        elif (live := conversion_jobs.get(job_id)) is not None:
+            # Another poll recorded the failure first; report what it stored
+            job.update(live)
+
+
+def _status_payload(job: JobStatus) -> Dict[str, object]:
+    """Build the client-facing status of a job."""
+    payload = {
         "status": job["status"],
         "progress": job["progress"],
         "errors": job["errors"]
@@ -781,46 +1682,188 @@ def get_status(job_id):
     
     # Add more detailed error information if available
     if job["errors"] and job["status"] == "failed":
-        response["error_details"] = "\n".join(job["errors"])
+        payload["error_details"] = "\n".join(job["errors"])
+    if job["status"] in ("completed", "completed_with_errors"):
+        # Names accepted by /download/<job_id>/<name>
+        payload["files"] = [path.name for path in job["output_files"]]
+    return payload
+
+
+@app.route("/status/<job_id>")
+def get_status(job_id):
+    """Get job status"""
+    job = _get_job(job_id)
+    if job is None:
+        return (jsonify({"error": "Job not found"}), 404)
+    _reconcile_status(job_id, job)
+
+    # Answer unchanged polls with 304 instead of re-serializing the status
+    etag = hashlib.blake2b(
+        "|".join(map(str, job_state(job))).encode(),
+        digest_size=8
+    ).hexdigest()
+    # Pending statuses must be revalidated on every poll; finished ones won't change
+    if job["status"] in TERMINAL_STATUSES:
+        cache_control = "private, max-age=60"
+    else:
+        cache_control = "no-cache"
+    if request.if_none_match.contains(etag):
+        return "", 304, {"Cache-Control": cache_control}
     
-    return jsonify(response)
+    response = jsonify(_status_payload(job))
+    response.set_etag(etag)
+    response.headers["Cache-Control"] = cache_control
+    return response
+
+
+def _iter_job_events(job_id: str):
+    """Yield a server-sent event each time a job's status changes, until it finishes."""
+    seen = None
+    while True:
+        job = conversion_jobs.wait(job_id, seen, timeout=EVENT_KEEPALIVE_SECONDS)
+        if job is None:
+            yield f"event: error\ndata: {app.json.dumps({'error': 'Job not found'})}\n\n"
+            return
+        _reconcile_status(job_id, job)
+        state = job_state(job)
+        if state == seen:
+            yield ": keep-alive\n\n"  # Comment line; stops proxies closing an idle stream
+            continue
+        seen = state
+        yield f"data: {app.json.dumps(_status_payload(job))}\n\n"
+        if job["status"] in TERMINAL_STATUSES:
+            return
+
+
+@app.route("/events/<job_id>")
+def stream_status(job_id):
+    """Stream job status as server-sent events instead of polling /status."""
+    if _get_job(job_id) is None:
+        return (jsonify({"error": "Job not found"}), 404)
+    if not _event_stream_slots.acquire(blocking=False):
+        # Clients can fall back to polling /status, which frees its thread at once
+        response = jsonify({"error": "Too many event streams, poll /status instead"})
+        response.headers["Retry-After"] = "1"
+        return response, 503
+    response = Response(
+        _iter_job_events(job_id),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+    # Released on close, which runs even if the client leaves before the first event
+    response.call_on_close(_event_stream_slots.release)
+    return response
+
+
+class _ZipStreamBuffer(io.RawIOBase):
+    """Write-only sink that hands zip bytes back to the response as they are produced."""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        return len(data)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _iter_zip(paths: List[Path]):
+    """Yield a ZIP archive of paths chunk by chunk, without building it in memory.
+
+    The sink is not seekable, so zipfile writes each member's sizes in a
+    data descriptor after its content.
+    """
+    sink = _ZipStreamBuffer()
+    # One read buffer per download, refilled in place; the sink copies what it keeps
+    buffer = bytearray(UPLOAD_BUFFER_SIZE)
+    view = memoryview(buffer)
+    # Members are stored, not deflated: the zip only bundles the outputs, so building
+    # it costs no CPU and stays I/O-bound however many files a job produced
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as zf:
+        for path in paths:
+            # from_file records the size up front, so zipfile picks ZIP64 when needed
+            zinfo = zipfile.ZipInfo.from_file(path, path.name)
+            with open(path, "rb", buffering=0) as src, zf.open(zinfo, "w") as dst:
+                if hasattr(os, "posix_fadvise"):
+                    # Members are read once, front to back: let the kernel read ahead further
+                    os.posix_fadvise(src.fileno(), 0, 0, os.POSIX_FADV_SEQUENTIAL)
+                while size := src.readinto(buffer):
+                    dst.write(view[:size])
+                    yield sink.drain()
+            # Member headers and descriptors are small; send them with the next chunk
+    yield sink.drain()
+
+
+def _send_output(output_path: Path) -> Response:
+    """Send one output file as an attachment, streamed from disk."""
+    # send_file resolves relative paths against app.root_path, but outputs are
+    # written relative to the working directory; conditional enables 304/206
+    response = send_file(
+        str(output_path.absolute()),
+        as_attachment=True,
+        download_name=output_path.name,
+        conditional=True,
+    )
+    # Outputs are the user's converted documents: let the browser revalidate its
+    # copy, but keep shared caches from storing them
+    response.cache_control.public = False
+    response.cache_control.private = True
+    return response
 
 
 @app.route("/download/<job_id>")
 def download_files(job_id):
     """Download converted files"""
-    if job_id not in conversion_jobs:
+    job = _get_job(job_id)
+    if job is None:
         return (jsonify({"error": "Job not found"}), 404)
 
-    job = conversion_jobs[job_id]
     if job["status"] not in ["completed", "completed_with_errors"]:
         return (jsonify({"error": "Job not complete"}), 400)
 
-    if len(job["output_files"]) == 1:
+    # A lone output is sent as is, unless the client asked for an archive regardless
+    archive = request.args.get("archive", "").lower() in ("1", "true", "yes")
+    if len(job["output_files"]) == 1 and not archive:
         # Single file download
-        output_path = job["output_files"][0]
-        return send_file(
-            str(output_path),
-            as_attachment=True,
-            download_name=output_path.name,
-        )
+        return _send_output(job["output_files"][0])
     else:
-        # Multiple files - create zip
-        import zipfile
-        import io
-
-        memory_file = io.BytesIO()
-        with zipfile.ZipFile(memory_file, "w") as zf:
-            for output_path in job["output_files"]:
-                zf.write(output_path, output_path.name)
-
-        memory_file.seek(0)
-        return send_file(
-            memory_file,
+        # Multiple files - stream the zip as it is written
+        response = Response(
+            _iter_zip(job["output_files"]),
             mimetype="application/zip",
-            as_attachment=True,
-            download_name="converted_files.zip",
+            headers={"Content-Disposition": "attachment; filename=converted_files.zip"},
         )
+        # A finished job's outputs never change, so its ID identifies the archive:
+        # a browser revalidating its copy gets a 304 and the zip is never rebuilt
+        response.set_etag(f"{job_id}-zip")
+        response.cache_control.private = True
+        response.cache_control.max_age = STATIC_MAX_AGE
+        return response.make_conditional(request)
+
+
+@app.route("/download/<job_id>/<name>")
+def download_file(job_id, name):
+    """Download one output file of a job without zipping the rest."""
+    job = _get_job(job_id)
+    if job is None:
+        return (jsonify({"error": "Job not found"}), 404)
+
+    if job["status"] not in ["completed", "completed_with_errors"]:
+        return (jsonify({"error": "Job not complete"}), 400)
+
+    # Only names the job produced are served, so the URL can't reach other files
+    for output_path in job["output_files"]:
+        if output_path.name == name:
+            return _send_output(output_path)
+    return (jsonify({"error": "File not found"}), 404)
 
 
 @app.route("/cleanup/<job_id>")
@@ -828,7 +1871,7 @@ def cleanup_job(job_id):
     """Clean up temporary files and job data after completion.
     
     Args:
-        job_id: str, UUID of the job to clean up
+        job_id: str, ID of the job to clean up, as returned when it was submitted
         
     Returns:
         JSON response with:
@@ -844,47 +1887,47 @@ def cleanup_job(job_id):
         - Uses secure path validation
         - Maintains audit log of cleanup operations
     """
-    if job_id not in conversion_jobs:
+    # Remove job data
+    job = _pop_job(job_id)
+    if job is None:
         return (jsonify({"error": "Job not found"}), 404)
 
-    job = conversion_jobs[job_id]
+    # Drop the job from the queue if it has not started yet
+    if job["future"] is not None:
+        job["future"].cancel()
 
     # Remove output files
-    for output_path in job["output_files"]:
-        try:
-            if output_path.exists():
-                output_path.unlink()
-        except Exception as e:
-            logger.error("Error cleaning up %s: %s", output_path, e)
-
-    # Remove job data
-    del conversion_jobs[job_id]
-    del job_events[job_id]
+    _remove_output_files(job_id)
 
     return jsonify({"status": "cleaned"})
 
 
-def load_env_file():
-    """Load environment variables from .env file if it exists."""
-    env_path = Path(__file__).parent / '.env'
-    if env_path.exists():
-        logger.info("Loading environment from .env file")
-        with open(env_path) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith('#'):
-                    key, value = line.split('=', 1)
-                    os.environ[key.strip()] = value.strip()
+def find_free_port(host: str, start: int, end: int) -> Optional[int]:
+    """Return the first port in [start, end] that host can bind, or None.
+
+    Probing with a bare socket is far cheaper than starting a server per port.
+    SO_REUSEADDR matches the servers, which can rebind ports in TIME_WAIT; it
+    is skipped on Windows, where it would allow binding a port in active use.
+    """
+    for port in range(start, end + 1):
+        with socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET) as probe:
+            if os.name != "nt":
+                probe.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+            try:
+                probe.bind((host, port))
+            except OSError:
+                logger.warning(f"Port {port} is in use, trying next port...")
+                continue
+        return port
+    return None
+
 
 if __name__ == "__main__":
     # Set up logging for the web server
     setup_logging(operation="web", context="server")
     
-    # Load environment variables
-    load_env_file()
-
-    # Configure environment-specific settings
-    flask_env = os.environ.get("FLASK_ENV", "development")
+    # Configure environment-specific settings; production unless the shell or .env says otherwise
+    flask_env = os.environ.get("FLASK_ENV", "production")
     debug_mode = flask_env == "development"
     log_level = os.environ.get("LOG_LEVEL", "WARNING")
     
@@ -895,30 +1938,35 @@ if __name__ == "__main__":
     host = os.environ.get("FLASK_RUN_HOST", "127.0.0.1")
     port = int(os.environ.get("FLASK_RUN_PORT", 8000))
     
+    wsgi_threads = int(os.environ.get("FILE2AI_WSGI_THREADS", 16))
+    use_waitress = not debug_mode and HAS_WAITRESS
+    if not debug_mode and not HAS_WAITRESS:
+        logger.warning("waitress not installed; falling back to the Flask development server")
+    
     logger.info(f"Starting server on {host}:{port} (debug={debug_mode})")
     
-    # Try multiple ports starting from default
+    # In development, find a free port starting from the default, then start the
+    # server once. The reloader's child inherits the parent's bound socket, so it
+    # skips the probe. Production binds the configured port or fails.
     start_port = port
     max_port = start_port + 20  # Try up to 20 ports
 
-    for port in range(start_port, max_port + 1):
-        try:
-            logger.info(f"Attempting to start server on port {port}...")
-            app.run(
-                debug=debug_mode,
-                host=host,
-                port=port,
-                use_reloader=debug_mode
-            )
-            break  # If successful, exit the loop
-        except OSError as e:
-            if "Address already in use" in str(e):
-                logger.warning(f"Port {port} is in use, trying next port...")
-                if port == max_port:
-                    logger.error("\nAll ports from %d to %d are in use.", start_port, max_port)
-                    logger.error("Try one of the following:")
-                    logger.error("1. Set a different port using: export FLASK_RUN_PORT=<port>")
-                    logger.error("2. Free up ports in the range %d-%d\n", start_port, max_port)
-                    sys.exit(1)
-                continue
-            raise  # Re-raise other OSErrors
+    if debug_mode and os.environ.get("WERKZEUG_RUN_MAIN") != "true":
+        port = find_free_port(host, start_port, max_port)
+        if port is None:
+            logger.error("\nAll ports from %d to %d are in use.", start_port, max_port)
+            logger.error("Try one of the following:")
+            logger.error("1. Set a different port using: export FLASK_RUN_PORT=<port>")
+            logger.error("2. Free up ports in the range %d-%d\n", start_port, max_port)
+            sys.exit(1)
+
+    logger.info(f"Using port {port}")
+    if use_waitress:
+        waitress_serve(app, host=host, port=port, threads=wsgi_threads)
+    else:
+        app.run(
+            debug=debug_mode,
+            host=host,
+            port=port,
+            use_reloader=debug_mode
+        )